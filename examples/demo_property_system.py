@@ -5,14 +5,19 @@
 """
 import sys
 import os
-sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-from models.map import Map
-from models.player import Player
-from models.property import Property
-from systems.property_manager import PropertyManager
-from core.constants import PROPERTY_LEVELS
+# 直接运行示例时（__package__ 为 None）把上一级的项目根目录加入Python路径，
+# 以 python -m examples.demo_property_system 运行时不需要
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if __package__ is None and PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
 
+from src.models.map import Map
+from src.models.player import Player
+from src.systems.property_manager import PropertyManager
+
+# 房产等级名称，按等级下标索引
+LEVEL_NAMES = ("空地", "一级", "二级", "三级", "四级")
 
 def demo_property_system():
     """演示房产系统功能"""
@@ -72,29 +77,10 @@ def demo_property_system():
 
 def setup_demo_properties(game_map, property_manager):
     """设置演示用的房产"""
-    # 在坐标(1,1)设置空地
-    cell = game_map.get_cell_at((1, 1))
-    if cell:
-        cell.cell_type = "empty"
-        property_obj = Property(position=1 * 5 + 1, level=0)
-        cell.set_property(property_obj)
-    
-    # 在坐标(2,2)设置空地
-    cell = game_map.get_cell_at((2, 2))
-    if cell:
-        cell.cell_type = "empty"
-        property_obj = Property(position=2 * 5 + 2, level=0)
-        cell.set_property(property_obj)
-    
-    # 在坐标(3,3)设置有主房产
-    cell = game_map.get_cell_at((3, 3))
-    if cell:
-        cell.cell_type = "empty"
-        property_obj = Property(position=3 * 5 + 3, owner_id=1, level=2)
-        cell.set_property(property_obj)
-    
-    # 重新初始化房产管理器
-    property_manager._initialize_properties()
+    # 在坐标(1,1)、(2,2)设置空地，在坐标(3,3)设置有主房产
+    property_manager.add_property(game_map.pos_of(1, 1))
+    property_manager.add_property(game_map.pos_of(2, 2))
+    property_manager.add_property(game_map.pos_of(3, 3), owner_id=1, level=2)
     
     print(f"   创建了 {len(property_manager.properties)} 个房产")
     print(f"   空地: {len(property_manager.get_empty_properties())} 个")
@@ -230,8 +216,7 @@ def demo_property_statistics(property_manager):
     
     print("\n   按等级统计:")
     for level, count in stats['level_statistics'].items():
-        level_name = {0: "空地", 1: "一级", 2: "二级", 3: "三级", 4: "四级"}[level]
-        print(f"     {level_name}: {count} 个")
+        print(f"     {LEVEL_NAMES[level]}: {count} 个")
     
     print("\n   按所有者统计:")
     for owner_id, count in stats['owner_statistics'].items():
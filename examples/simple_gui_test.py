@@ -3,11 +3,6 @@
 简单的GUI测试
 """
 import pygame
-import sys
-import os
-
-# 添加项目根目录到Python路径
-sys.path.insert(0, os.path.dirname(__file__))
 
 def main():
     """主函数"""
@@ -24,37 +19,39 @@ def main():
         # 初始化字体
         font = pygame.font.Font(None, 36)
         
-        # 游戏循环
+        # 预渲染静态文本（内容不变，无需每帧重新渲染）
+        text = font.render("大富翁游戏测试", True, (0, 0, 0))
+        text_rect = text.get_rect(center=(400, 300))
+        instruction = font.render("按ESC键退出", True, (100, 100, 100))
+        instruction_rect = instruction.get_rect(center=(400, 350))
+        
+        # 游戏循环：静态画面，阻塞等待事件，只在需要时重绘
         running = True
-        clock = pygame.time.Clock()
+        dirty = True
         
         while running:
-            # 处理事件
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE:
-                        running = False
-            
-            # 清屏
-            screen.fill((255, 255, 255))
+            # 画面无变化时跳过重绘
+            if dirty:
+                # 清屏
+                screen.fill((255, 255, 255))
+                
+                # 绘制文本和说明
+                screen.blit(text, text_rect)
+                screen.blit(instruction, instruction_rect)
+                
+                # 更新显示
+                pygame.display.flip()
+                dirty = False
             
-            # 绘制文本
-            text = font.render("大富翁游戏测试", True, (0, 0, 0))
-            text_rect = text.get_rect(center=(400, 300))
-            screen.blit(text, text_rect)
-            
-            # 绘制说明
-            instruction = font.render("按ESC键退出", True, (100, 100, 100))
-            instruction_rect = instruction.get_rect(center=(400, 350))
-            screen.blit(instruction, instruction_rect)
-            
-            # 更新显示
-            pygame.display.flip()
-            
-            # 控制帧率
-            clock.tick(60)
+            # 处理事件（无事件时进程休眠）
+            event = pygame.event.wait(1000)
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    running = False
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.VIDEORESIZE):
+                dirty = True
         
         # 退出
         pygame.quit()
@@ -7,8 +7,11 @@ from tkinter import ttk, messagebox
 import sys
 import os
 
-# 添加项目根目录到Python路径
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# 直接运行时（__package__ 为 None）才插入项目根目录；
+# 以 python -m examples.simple_test_dialog 运行或被导入时跳过
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if __package__ is None and PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
 
 from src.utils.map_editor import NewMapDialog
 
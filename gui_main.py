@@ -4,8 +4,11 @@
 import sys
 import os
 
-# 添加项目根目录到Python路径
-sys.path.insert(0, os.path.dirname(__file__))
+# 仅在作为脚本运行时（__package__ 为 None）检查项目根目录，已在路径中则不插入；
+# 作为模块导入时由调用方负责路径
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+if __package__ is None and PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
 
 from src.ui.main_window import MainWindow
 
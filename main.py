@@ -6,8 +6,11 @@ import sys
 import os
 import random
 
-# 添加项目根目录到Python路径
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# 作为脚本运行时（__package__ 为 None）确保项目根目录在Python路径中；
+# 脚本目录通常已是 sys.path[0]，此时不再重复插入。被导入时跳过
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+if __package__ is None and PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
 
 from src.models.map import Map
 from src.systems.player_manager import PlayerManager
@@ -22,7 +25,91 @@ def display_player_status(player):
     print(f"房产数: {len(player.properties)}")
 
 
-def handle_item_shop(player_manager, player):
+def parse_choice_index(choice, count):
+    """
+    将菜单输入解析为从0开始的下标
+    
+    Returns:
+        Optional[int]: 有效时返回下标，否则返回None
+    """
+    try:
+        index = int(choice)
+    except ValueError:
+        return None
+    if 1 <= index <= count:
+        return index - 1
+    return None
+
+
+class TerminalDriver:
+    """终端驱动：通过input()向玩家询问决策"""
+    
+    def ask(self, prompt, choices=None):
+        """询问一个文本选择（已去除空白并转为小写）；choices 为有效答案，终端输入不受其限制"""
+        return input(prompt).strip().lower()
+    
+    def text(self, prompt, default=None):
+        """询问一段自由文本（如玩家名称）"""
+        return input(prompt)
+    
+    def confirm(self, prompt):
+        """询问是/否"""
+        return self.ask(prompt) == 'y'
+    
+    def pause(self, prompt):
+        """等待玩家按回车"""
+        input(prompt)
+    
+    def run_turn(self, player_manager, player):
+        """执行一个人类玩家回合"""
+        handle_player_turn(player_manager, player, self)
+        self.pause("按回车结束回合...")
+
+
+class AutoDriver(TerminalDriver):
+    """自动驱动：使用脚本答案或随机答案代替终端输入，用于无人值守模拟"""
+    
+    def __init__(self, answers=None, rng=None):
+        """
+        初始化自动驱动
+        
+        Args:
+            answers: 预设答案序列，用完后回退到默认/随机答案
+            rng: 随机数生成器
+        """
+        self.answers = iter(answers or ())
+        self.rng = rng or random.Random()
+    
+    def ask(self, prompt, choices=None):
+        answer = next(self.answers, None)
+        if answer is None:
+            return self.rng.choice(choices) if choices else 'q'
+        return answer
+    
+    def text(self, prompt, default=None):
+        return next(self.answers, default)
+    
+    def confirm(self, prompt):
+        answer = next(self.answers, None)
+        if answer is None:
+            return self.rng.random() < 0.5
+        return answer == 'y'
+    
+    def pause(self, prompt):
+        pass
+
+
+def _print_menu(player_manager, player, shop_items):
+    """打印当前商店道具"""
+    print("\n当前商店道具:")
+    affordable_items = set(player_manager.shop_system.get_affordable_items(player))
+    for i, (item_name, item_info) in enumerate(shop_items.items(), 1):
+        status = "✅ 可购买" if item_name in affordable_items else "❌ 金钱不足"
+        print(f"{i}. {item_name} - {item_info['price']:,}元 ({item_info['stock']}个库存) {status}")
+        print(f"   描述: {item_info['description']}")
+
+
+def handle_item_shop(player_manager, player, driver):
     """处理道具商店"""
     print(f"\n🏪 欢迎来到道具商店！")
     print(f"你的金钱: {player.money:,}")
@@ -33,20 +120,16 @@ def handle_item_shop(player_manager, player):
         print("商店暂时没有道具...")
         return
     
-    print("\n当前商店道具:")
-    for i, (item_name, item_info) in enumerate(shop_items.items(), 1):
-        affordable = player_manager.shop_system.can_afford_item(player, item_name)
-        status = "✅ 可购买" if affordable else "❌ 金钱不足"
-        print(f"{i}. {item_name} - {item_info['price']:,}元 ({item_info['stock']}个库存) {status}")
-        print(f"   描述: {item_info['description']}")
+    _print_menu(player_manager, player, shop_items)
     
+    item_names = list(shop_items.keys())
     while True:
         print("\n选择操作:")
         print("1-2: 购买对应道具")
         print("r: 刷新商店")
         print("q: 离开商店")
         
-        choice = input("请输入选择: ").strip().lower()
+        choice = driver.ask("请输入选择: ", [str(i) for i in range(1, len(item_names) + 1)] + ['r', 'q'])
         
         if choice == 'q':
             print("离开商店")
@@ -54,23 +137,23 @@ def handle_item_shop(player_manager, player):
         elif choice == 'r':
             result = player_manager.refresh_shop()
             print(result["msg"])
-            return handle_item_shop(player_manager, player)
-        elif choice in ['1', '2']:
+            shop_items = player_manager.get_shop_items()
             item_names = list(shop_items.keys())
-            if 1 <= int(choice) <= len(item_names):
-                item_name = item_names[int(choice) - 1]
-                result = player_manager.buy_shop_item(player, item_name)
-                print(result["msg"])
-                if result["success"]:
-                    print(f"剩余库存: {result['remaining_stock']}")
-                    display_player_status(player)
-            else:
-                print("无效选择")
+            _print_menu(player_manager, player, shop_items)
+            continue
         else:
-            print("无效选择")
+            index = parse_choice_index(choice, len(item_names))
+            if index is None:
+                print("无效选择")
+                continue
+            result = player_manager.buy_shop_item(player, item_names[index])
+            print(result["msg"])
+            if result["success"]:
+                print(f"剩余库存: {result['remaining_stock']}")
+                display_player_status(player)
 
 
-def handle_dice_shop(player_manager, player):
+def handle_dice_shop(player_manager, player, driver):
     """处理骰子商店"""
     print(f"\n🎲 欢迎来到骰子商店！")
     print(f"你的金钱: {player.money:,} 道具数: {len(player.items)}")
@@ -99,27 +182,27 @@ def handle_dice_shop(player_manager, player):
         print("s: 切换当前骰子")
         print("q: 离开商店")
         
-        choice = input("请输入选择: ").strip().lower()
+        choice = driver.ask("请输入选择: ", [str(i) for i in range(1, len(shop_dice) + 1)] + ['s', 'q'])
         
         if choice == 'q':
             print("离开商店")
             break
         elif choice == 's':
-            handle_dice_switch(player_manager, player)
-        elif choice in ['1', '2', '3', '4', '5', '6']:
-            if 1 <= int(choice) <= len(shop_dice):
-                dice = shop_dice[int(choice) - 1]
-                result = player_manager.buy_dice(player, dice["type"])
-                print(result["msg"])
-                if result["success"]:
-                    display_player_status(player)
-            else:
-                print("无效选择")
+            handle_dice_switch(player_manager, player, driver)
         else:
-            print("无效选择")
+            index = parse_choice_index(choice, len(shop_dice))
+            if index is None:
+                print("无效选择")
+                continue
+            result = player_manager.buy_dice(player, shop_dice[index]["type"])
+            print(result["msg"])
+            if result["success"]:
+                # 只有购买成功后骰子列表才会变化
+                shop_dice = player_manager.get_available_dice(player)['shop_dice']
+                display_player_status(player)
 
 
-def handle_dice_switch(player_manager, player):
+def handle_dice_switch(player_manager, player, driver):
     """处理骰子切换"""
     dice_info = player_manager.get_available_dice(player)
     available_dice = dice_info['available_dice']
@@ -136,39 +219,36 @@ def handle_dice_switch(player_manager, player):
         else:
             print(f"{i}. {dice_type}")
     
-    choice = input("选择要切换的骰子 (1-{}): ".format(len(available_dice)))
-    try:
-        choice_idx = int(choice) - 1
-        if 0 <= choice_idx < len(available_dice):
-            dice_type = available_dice[choice_idx]
-            result = player_manager.set_player_dice(player, dice_type)
-            print(result["msg"])
-        else:
-            print("无效选择")
-    except ValueError:
-        print("无效输入")
+    choice = driver.ask("选择要切换的骰子 (1-{}): ".format(len(available_dice)),
+                        [str(i) for i in range(1, len(available_dice) + 1)])
+    index = parse_choice_index(choice, len(available_dice))
+    if index is None:
+        print("无效选择")
+        return
+    result = player_manager.set_player_dice(player, available_dice[index])
+    print(result["msg"])
 
 
-def handle_shop_interaction(player_manager, player):
+def handle_shop_interaction(player_manager, player, driver):
     """处理商店交互"""
     cell = player_manager.game_map.get_cell_by_path_index(player.position)
     
     if cell.cell_type == "shop":
-        return handle_item_shop(player_manager, player)
+        return handle_item_shop(player_manager, player, driver)
     elif cell.cell_type == "dice_shop":
-        return handle_dice_shop(player_manager, player)
+        return handle_dice_shop(player_manager, player, driver)
     
     return None
 
 
-def handle_player_turn(player_manager, player):
+def handle_player_turn(player_manager, player, driver):
     """处理玩家回合"""
     print(f"\n=== {player.name} 的回合 ===")
     display_player_status(player)
     
     if player.in_jail:
         print(f"你在监狱中，剩余回合: {3 - player.jail_turns}")
-        input("按回车投掷骰子尝试越狱...")
+        driver.pause("按回车投掷骰子尝试越狱...")
         dice_result = player_manager.roll_dice(player)
         print(f"投掷结果: {dice_result['dice_result']}")
         if dice_result.get('escaped'):
@@ -177,7 +257,7 @@ def handle_player_turn(player_manager, player):
             print("越狱失败，继续关押")
         return
     
-    input("按回车投掷骰子...")
+    driver.pause("按回车投掷骰子...")
     dice_result = player_manager.roll_dice(player)
     print(f"投掷结果: {dice_result['dice_result']}")
     
@@ -196,7 +276,7 @@ def handle_player_turn(player_manager, player):
         print(f"格子效果: {cell_effect['msg']}")
         
         if cell_effect["type"] in ["shop", "dice_shop"]:
-            handle_shop_interaction(player_manager, player)
+            handle_shop_interaction(player_manager, player, driver)
         
         if "event" in cell_effect:
             event = cell_effect["event"]
@@ -206,23 +286,20 @@ def handle_player_turn(player_manager, player):
         property_obj = move_result["property"]
         if not property_obj.is_owned():
             print(f"发现空地，购买价格: {property_obj.get_cost():,}")
-            buy = input("是否购买? (y/n): ").strip().lower() == 'y'
-            if buy:
+            if driver.confirm("是否购买? (y/n): "):
                 result = player_manager.buy_property_decision(player, player.position, True)
                 print(result["msg"])
         elif property_obj.owner_id == player.player_id:
             print("到达自己的房产")
             if property_obj.can_upgrade():
-                upgrade = input("是否升级? (y/n): ").strip().lower() == 'y'
-                if upgrade:
+                if driver.confirm("是否升级? (y/n): "):
                     result = player_manager.upgrade_property_decision(player, player.position, True)
                     print(result["msg"])
     
     if player.items:
         print(f"\n你的道具: {player.items}")
-        use_item = input("是否使用道具? (y/n): ").strip().lower() == 'y'
-        if use_item:
-            item_id = input("选择道具ID: ")
+        if driver.confirm("是否使用道具? (y/n): "):
+            item_id = driver.ask("选择道具ID: ", [str(item) for item in player.items])
             try:
                 item_id = int(item_id)
                 if item_id in player.items:
@@ -239,7 +316,7 @@ def handle_ai_shop_decision(player_manager, player, shop_type):
     if shop_type == "shop":
         affordable_items = player_manager.get_affordable_items(player)
         if affordable_items and random.random() < 0.5:
-            item_name = random.choice(affordable_items)
+            item_name = affordable_items[random.randrange(len(affordable_items))]
             result = player_manager.buy_shop_item(player, item_name)
             print(f"AI购买道具：{result['msg']}")
     
@@ -248,21 +325,62 @@ def handle_ai_shop_decision(player_manager, player, shop_type):
         shop_dice = dice_info['shop_dice']
         
         if shop_dice and random.random() < 0.3:
-            affordable_dice = []
-            for dice in shop_dice:
-                if player_manager.dice_system.can_afford_dice(
-                    dice["type"], player.money, len(player.items)
-                ):
-                    affordable_dice.append(dice)
+            # 本回合内金钱和道具数不变，提前取出
+            can_afford = player_manager.dice_system.can_afford_dice
+            money = player.money
+            item_count = len(player.items)
+            affordable_dice = [
+                dice for dice in shop_dice
+                if can_afford(dice["type"], money, item_count)
+            ]
             
             if affordable_dice:
-                dice = random.choice(affordable_dice)
+                dice = affordable_dice[random.randrange(len(affordable_dice))]
                 result = player_manager.buy_dice(player, dice["type"])
                 print(f"AI购买骰子：{result['msg']}")
 
 
-def main():
-    """主函数"""
+def handle_ai_turn(player_manager, player):
+    """处理AI回合"""
+    ai_result = player_manager.ai_decision(player)
+    if not ai_result["success"]:
+        return
+    decisions = ai_result["decisions"]
+    
+    if "dice" in decisions:
+        dice_result = decisions["dice"]
+        print(f"AI投掷骰子：{dice_result}")
+        move_result = player_manager.move_player(player, dice_result)
+        print(f"AI移动结果：{move_result['msg']}")
+        
+        if "cell_effect" in move_result:
+            cell_effect = move_result["cell_effect"]
+            print(f"格子效果：{cell_effect['msg']}")
+            
+            if cell_effect["type"] in ["shop", "dice_shop"]:
+                handle_ai_shop_decision(player_manager, player, cell_effect["type"])
+            
+            if "event" in cell_effect:
+                print(f"事件：{cell_effect['event']['msg']}")
+    
+    if "buy_property" in decisions:
+        result = player_manager.buy_property_decision(player, player.position, True)
+        print(f"AI购买房产：{result['msg']}")
+    
+    if "use_item" in decisions:
+        item_id = decisions["use_item"]
+        result = player_manager.use_item_decision(player, item_id)
+        print(f"AI使用道具：{result['msg']}")
+
+
+def main(driver=None):
+    """
+    主函数
+    
+    Args:
+        driver: 玩家设置与人类玩家回合的输入驱动，默认使用终端输入
+    """
+    driver = driver or TerminalDriver()
     print("🎲 欢迎来到大富翁游戏！")
     
     game_map = Map(20, 20)
@@ -270,65 +388,36 @@ def main():
     player_manager.set_game_map(game_map)
     
     print("\n设置玩家:")
-    player_count = int(input("玩家数量 (3-6): "))
+    player_count = int(driver.ask("玩家数量 (3-6): ", ['3', '4', '5', '6']))
     for i in range(player_count):
-        name = input(f"玩家{i+1}名称: ")
-        is_ai = input(f"玩家{i+1}是否为AI? (y/n): ").strip().lower() == 'y'
+        name = driver.text(f"玩家{i+1}名称: ", f"玩家{i+1}")
+        is_ai = driver.confirm(f"玩家{i+1}是否为AI? (y/n): ")
         player_manager.add_player(name, is_ai)
     
     print(f"\n游戏开始！地图大小: {game_map.width}x{game_map.height}")
     print("每个玩家初始资金: 200,000元")
 
+    # get_game_status 不提供回合数与胜者对象之外的信息，回合数在此计数
+    turn_count = 0
     while True:
         status = player_manager.get_game_status()
         if status["game_ended"]:
-            print("游戏结束！胜者：", player_manager.winner.name)
+            print("游戏结束！胜者：", status["winner"].name)
             break
         
         player = player_manager.get_current_player()
+        turn_count += 1
         
         if player.is_ai:
-            print(f"\n--- 回合 {status['turn_count']+1} --- 当前玩家：{player.name} (AI)")
+            print(f"\n--- 回合 {turn_count} --- 当前玩家：{player.name} (AI)")
             print("AI正在行动...")
-            
-            ai_result = player_manager.ai_decision(player)
-            if ai_result["success"]:
-                decisions = ai_result["decisions"]
-                
-                if "dice" in decisions:
-                    dice_result = decisions["dice"]
-                    print(f"AI投掷骰子：{dice_result}")
-                    move_result = player_manager.move_player(player, dice_result)
-                    print(f"AI移动结果：{move_result['msg']}")
-                    
-                    if "cell_effect" in move_result:
-                        cell_effect = move_result["cell_effect"]
-                        print(f"格子效果：{cell_effect['msg']}")
-                        
-                        if cell_effect["type"] in ["shop", "dice_shop"]:
-                            handle_ai_shop_decision(player_manager, player, cell_effect["type"])
-                        
-                        if "event" in cell_effect:
-                            print(f"事件：{cell_effect['event']['msg']}")
-                
-                if "buy_property" in decisions:
-                    result = player_manager.buy_property_decision(player, player.position, True)
-                    print(f"AI购买房产：{result['msg']}")
-                
-                if "use_item" in decisions:
-                    item_id = decisions["use_item"]
-                    result = player_manager.use_item_decision(player, item_id)
-                    print(f"AI使用道具：{result['msg']}")
-            
-            player_manager.end_turn()
-            continue
-        
-        print(f"\n--- 回合 {status['turn_count']+1} --- 当前玩家：{player.name}")
-        handle_player_turn(player_manager, player)
+            handle_ai_turn(player_manager, player)
+        else:
+            print(f"\n--- 回合 {turn_count} --- 当前玩家：{player.name}")
+            driver.run_turn(player_manager, player)
         
-        input("按回车结束回合...")
         player_manager.end_turn()
 
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
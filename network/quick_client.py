@@ -4,7 +4,31 @@
 """
 
 import asyncio
-import json
+import os
+import sys
+
+# 将项目根目录加入Python路径以导入 src 下的共享模块（已在路径中则跳过）
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.network.wire import encode_message, decode_message
+
+try:
+    import websockets
+    WEBSOCKETS_AVAILABLE = True
+except ImportError:
+    WEBSOCKETS_AVAILABLE = False
+
+SERVER_URI = "ws://localhost:8765"
+
+
+# 测试消息内容固定，只序列化一次
+TEST_MESSAGE = {
+    "type": "test",
+    "message": "你好，服务器！"
+}
+TEST_PAYLOAD = encode_message(TEST_MESSAGE)
 
 def safe_input(prompt="按 Enter 键继续..."):
     try:
@@ -13,36 +37,42 @@ def safe_input(prompt="按 Enter 键继续..."):
         print("\n程序退出")
         return ""
 
-async def test_client():
+async def run_test(websocket, payload=TEST_PAYLOAD):
+    """
+    在已建立的连接上发送一条测试消息并等待回应
+    
+    Returns:
+        服务器回应数据，超时返回None
+    """
+    await websocket.send(payload)
+    print("📤 已发送测试消息")
+    
     try:
-        import websockets
-        print(f"✅ websockets版本: {websockets.__version__}")
-    except ImportError:
+        response = await asyncio.wait_for(websocket.recv(), timeout=5.0)
+    except asyncio.TimeoutError:
+        print("⏰ 等待服务器回应超时")
+        return None
+    
+    data = decode_message(response)
+    print(f"📥 服务器回应: {data}")
+    return data
+
+async def test_client(count=1, uri=SERVER_URI):
+    """连接服务器一次，并在同一连接上发送count条测试消息"""
+    if not WEBSOCKETS_AVAILABLE:
         print("❌ 缺少websockets模块")
         safe_input()
         return
+    print(f"✅ websockets版本: {websockets.__version__}")
     
-    uri = "ws://localhost:8765"
     print(f"🔗 正在连接到: {uri}")
     
     try:
         async with websockets.connect(uri) as websocket:
             print("✅ 连接成功！")
             
-            test_message = {
-                "type": "test",
-                "message": "你好，服务器！"
-            }
-            
-            await websocket.send(json.dumps(test_message, ensure_ascii=False))
-            print("📤 已发送测试消息")
-            
-            try:
-                response = await asyncio.wait_for(websocket.recv(), timeout=5.0)
-                data = json.loads(response)
-                print(f"📥 服务器回应: {data}")
-            except asyncio.TimeoutError:
-                print("⏰ 等待服务器回应超时")
+            for _ in range(count):
+                await run_test(websocket)
             
             print("🎮 客户端测试完成")
     
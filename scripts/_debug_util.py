@@ -0,0 +1,27 @@
+"""
+调试/修复脚本共用的小工具
+各脚本直接运行时脚本目录在sys.path中，用 from _debug_util import ... 导入
+"""
+import sys
+
+import pygame
+
+# 真正从SDL队列取事件的函数，调试循环每帧只调用一次
+pygame_event_get = pygame.event.get
+
+def feed_events(events):
+    """让MainWindow.handle_events下一次调用pygame.event.get()时拿到同一批事件"""
+    def get_once(*args, **kwargs):
+        pygame.event.get = pygame_event_get
+        return events
+    pygame.event.get = get_once
+
+def short_stack(limit=5):
+    """只遍历最近limit层调用帧，返回"文件:行号 函数名"列表（由近到远，不含本函数）"""
+    frame = sys._getframe(1)
+    lines = []
+    while frame is not None and len(lines) < limit:
+        code = frame.f_code
+        lines.append(f"{code.co_filename}:{frame.f_lineno} {code.co_name}")
+        frame = frame.f_back
+    return lines
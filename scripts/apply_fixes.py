@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+一次性应用所有 main_window.py 修复
+只读写文件各一次，中间依次调用各修复脚本提供的纯函数（bytes -> bytes），不做解码
+"""
+
+import os
+import sys
+
+from fix_mapview import fix_mapview
+from fix_shop_issues import apply_shop_fixes
+from shop_fix import fix_shop
+from fix_main_crash import patch_main_window
+
+MAIN_WINDOW_PATH = "src/ui/main_window.py"
+
+# 读写缓冲区大小（1MB），整个文件一次读入、一次写出
+_BUFFER_SIZE = 1 << 20
+
+# 修复流水线：(名称, 变换函数)，按顺序执行
+# fix_shop_issues 先于 shop_fix，让绘制调用优先得到带 try 的版本
+_PIPELINE = (
+    # fix_screen_to_map_pos.py 只是 fix_mapview 的别名，不再重复执行
+    ("MapView参数", fix_mapview),
+    ("商店问题", apply_shop_fixes),
+    ("商店属性", fix_shop),
+    ("游戏崩溃", patch_main_window),
+)
+
+def apply_all_fixes(path=MAIN_WINDOW_PATH):
+    """读取一次文件，应用全部修复后写回一次"""
+    if not os.path.exists(path):
+        print(f"❌ 文件不存在: {path}")
+        return False
+
+    with open(path, 'rb', buffering=_BUFFER_SIZE) as f:
+        original = f.read()
+
+    content = original
+    for name, transform in _PIPELINE:
+        try:
+            fixed = transform(content)
+        except SyntaxError as e:
+            print(f"❌ {name}修复失败，无法解析源码: {e}")
+            return False
+
+        if fixed != content:
+            print(f"✅ 应用了{name}修复")
+            content = fixed
+        else:
+            print(f"ℹ️ {name}无需修复")
+
+    if content == original:
+        print("ℹ️ 没有发现需要修复的问题")
+        return True
+
+    with open(path, 'wb', buffering=_BUFFER_SIZE) as f:
+        f.write(content)
+
+    print(f"✅ 修复完成: {path}")
+    return True
+
+def main():
+    """主函数"""
+    # 关闭行缓冲，所有输出在退出时一次写出
+    sys.stdout.reconfigure(line_buffering=False)
+    print("🔧 开始应用所有修复...")
+    path = sys.argv[1] if len(sys.argv) > 1 else MAIN_WINDOW_PATH
+
+    if apply_all_fixes(path):
+        print("✅ 所有修复已完成！")
+    else:
+        print("❌ 修复失败")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -3,180 +3,234 @@
 根本问题：游戏在投掷骰子后的结算阶段出现未捕获的异常导致崩溃
 """
 
+import os
 import sys
+import logging
 import traceback
-sys.path.append('.')
+import faulthandler
+if '.' not in sys.path:
+    sys.path.insert(0, '.')
 
-def patch_main_window():
-    """修复MainWindow中的崩溃问题"""
-    from src.ui.main_window import MainWindow
+from src.ui.exc_report import should_report
+
+# 可选：wrapt的C扩展包装器，单层调用且保留签名/__wrapped__，未安装时回退到普通闭包
+try:
+    import wrapt
+    WRAPT_AVAILABLE = True
+except ImportError:
+    WRAPT_AVAILABLE = False
+
+# 修复日志：前缀由Formatter统一添加，默认只输出WARNING及以上，
+# 低于该级别的调用在格式化参数之前就直接返回
+logger = logging.getLogger("crashfix")
+if not logger.handlers:
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(logging.Formatter("🔧 [修复] %(message)s"))
+    logger.addHandler(_handler)
+    logger.propagate = False
+logger.setLevel(logging.WARNING)
+
+# 设置环境变量CRASHFIX_TRACE后，每帧调用的方法异常也打印完整堆栈
+_TRACE = bool(os.environ.get("CRASHFIX_TRACE"))
+
+def _report_exception(what, e, stack=True):
+    """记录异常（及堆栈），同一位置的同类异常每秒最多记录一次"""
+    if should_report(e):
+        logger.warning("%s: %s", what, e)
+        if stack:
+            traceback.print_exception(type(e), e, e.__traceback__)
+    # 释放堆栈帧引用，避免保留整个UI状态
+    e.__traceback__ = None
+
+# 结算后的(phase_auto_advance, phase_timer)只有两种结果：有窗口打开/没有窗口打开
+_WINDOW_OPEN_PLAN = (False, 0)
+_WINDOW_CLOSED_PLAN = (True, 1500)
+
+# 结算后打开时暂停自动推进的窗口（MainWindow._modal_windows的键）：银行、道具商店、房产
+_SETTLEMENT_WINDOWS = ("bank", "item_shop", "property")
+
+def _after_settlement(self):
+    """结算完成后，根据是否有UI窗口打开决定是否自动推进"""
+    # 检查是否有UI窗口打开，如果有则不自动推进
+    windows = self._modal_windows
+    has_open_window = any(
+        getattr(windows.get(key), 'visible', False) for key in _SETTLEMENT_WINDOWS
+    )
     
-    # 保存原始方法
-    original_execute_settlement = MainWindow.execute_settlement
-    original_advance_phase = MainWindow.advance_phase
-    original_update = MainWindow.update
-    original_handle_events = MainWindow.handle_events
+    # 只有在没有窗口打开时才设置自动推进
+    self.phase_auto_advance, self.phase_timer = (
+        _WINDOW_OPEN_PLAN if has_open_window else _WINDOW_CLOSED_PLAN
+    )
+    if has_open_window:
+        logger.debug("有窗口打开，暂停自动推进")
+
+def _recover_settlement(self, e):
+    """结算异常时的安全处理"""
+    _report_exception("结算异常", e)
     
-    def safe_execute_settlement(self):
-        """安全的结算执行"""
-        try:
-            print("🔧 [修复] 开始安全结算")
-            original_execute_settlement(self)
-            print("🔧 [修复] 结算完成")
-            
-            # 检查是否有UI窗口打开，如果有则不自动推进
-            has_open_window = False
-            if hasattr(self, 'bank_window') and self.bank_window and getattr(self.bank_window, 'visible', False):
-                has_open_window = True
-                print("🔧 [修复] 银行窗口已打开，暂停自动推进")
-            elif hasattr(self, 'item_shop_window') and self.item_shop_window and getattr(self.item_shop_window, 'visible', False):
-                has_open_window = True
-                print("🔧 [修复] 道具商店窗口已打开，暂停自动推进")
-            elif hasattr(self, 'property_window') and self.property_window and getattr(self.property_window, 'visible', False):
-                has_open_window = True
-                print("🔧 [修复] 房产窗口已打开，暂停自动推进")
-            
-            # 只有在没有窗口打开时才设置自动推进
-            if not has_open_window:
-                self.phase_auto_advance = True
-                self.phase_timer = 1500
-                print("🔧 [修复] 设置自动推进定时器")
-            else:
-                self.phase_auto_advance = False
-                self.phase_timer = 0
-                print("🔧 [修复] 因窗口打开而暂停自动推进")
-            
-        except Exception as e:
-            print(f"🔧 [修复] 结算异常: {e}")
-            traceback.print_exc()
-            
-            # 异常时安全处理
-            try:
-                current_player = self.game_state.get_current_player()
-                if current_player:
-                    self.add_message(f"{current_player.name}结算时出现问题，自动跳过", "error")
-                
-                # 强制推进到下一阶段
-                print("🔧 [修复] 异常时强制推进阶段")
-                self.phase_auto_advance = False
-                self.advance_phase()
-                
-            except Exception as e2:
-                print(f"🔧 [修复] 强制推进也失败: {e2}")
-                # 最后手段：重置游戏状态
-                self.phase_auto_advance = False
-                self.phase_timer = 0
+    try:
+        current_player = self.game_state.get_current_player()
+        if current_player:
+            self.add_message(f"{current_player.name}结算时出现问题，自动跳过", "error")
+        
+        # 强制推进到下一阶段
+        logger.info("异常时强制推进阶段")
+        self.phase_auto_advance = False
+        self.advance_phase()
+        
+    except Exception as e2:
+        logger.error("强制推进也失败: %s", e2)
+        # 最后手段：重置游戏状态
+        self.phase_auto_advance = False
+        self.phase_timer = 0
+
+def _recover_advance_phase(self, e):
+    """阶段推进异常时的安全处理"""
+    _report_exception("阶段推进异常", e)
     
-    def safe_advance_phase(self):
-        """安全的阶段推进"""
-        try:
-            print("🔧 [修复] 开始安全阶段推进")
-            original_advance_phase(self)
-            print("🔧 [修复] 阶段推进完成")
-        except Exception as e:
-            print(f"🔧 [修复] 阶段推进异常: {e}")
-            traceback.print_exc()
-            
-            # 异常时的安全处理
-            try:
-                # 重置自动推进状态
-                self.phase_auto_advance = False
-                self.phase_timer = 0
-                
-                # 添加错误消息
-                self.add_message("阶段推进时出现错误", "error")
+    try:
+        # 重置自动推进状态
+        self.phase_auto_advance = False
+        self.phase_timer = 0
+        
+        # 添加错误消息
+        self.add_message("阶段推进时出现错误", "error")
+        
+        # 尝试获取当前玩家
+        current_player = self.game_state.get_current_player()
+        if current_player:
+            logger.info("当前玩家: %s", current_player.name)
+            # 确保游戏继续运行
+            if not getattr(self, 'emergency_recovery_deadline', 0):
+                import pygame
+                self.emergency_recovery_deadline = pygame.time.get_ticks() + 3000  # 3秒后尝试恢复
+                logger.info("设置紧急恢复定时器")
                 
-                # 尝试获取当前玩家
-                current_player = self.game_state.get_current_player()
-                if current_player:
-                    print(f"🔧 [修复] 当前玩家: {current_player.name}")
-                    # 确保游戏继续运行
-                    if not hasattr(self, 'emergency_recovery_timer'):
-                        self.emergency_recovery_timer = 3000  # 3秒后尝试恢复
-                        print("🔧 [修复] 设置紧急恢复定时器")
-                        
-            except Exception as e2:
-                print(f"🔧 [修复] 紧急处理也失败: {e2}")
-                # 保持游戏运行，不崩溃
+    except Exception as e2:
+        logger.error("紧急处理也失败: %s", e2)
+        # 保持游戏运行，不崩溃
+
+def _after_update(self):
+    """处理紧急恢复"""
+    deadline = getattr(self, 'emergency_recovery_deadline', 0)
+    if deadline:
+        import pygame
+        if pygame.time.get_ticks() >= deadline:
+            logger.info("执行紧急恢复")
+            self.emergency_recovery_deadline = 0
+            # 尝试重新开始准备阶段
+            try:
+                self.game_state.set_current_phase("preparation")
+                self.start_preparation_phase()
+            except:
                 pass
+
+def _recover_update(self, e):
+    """更新异常时不让异常传播，保持游戏运行"""
+    # 每帧都可能触发，默认只记录异常信息
+    _report_exception("更新异常", e, stack=_TRACE)
+
+def _recover_handle_events(self, e):
+    """事件处理异常时清理有问题的事件，但不崩溃"""
+    _report_exception("事件处理异常", e, stack=_TRACE)
+    import pygame
+    # 只丢弃输入事件，保留USEREVENT定时器（如延迟移动回调）
+    pygame.event.clear(eventtype=[
+        pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP,
+        pygame.KEYDOWN, pygame.KEYUP,
+    ])
+
+# 需要保护的方法：(方法名, 成功后处理, 异常处理)
+_SAFE_METHODS = (
+    ("execute_settlement", _after_settlement, _recover_settlement),
+    ("advance_phase", None, _recover_advance_phase),
+    ("update", _after_update, _recover_update),
+    ("handle_events", None, _recover_handle_events),
+)
+
+def _safe_dispatch(name, original, after=None, cleanup=None):
+    """生成共用一个try/except的安全包装方法，原始方法通过self._orig_<name>调用"""
+    if WRAPT_AVAILABLE:
+        def safe_call(wrapped, instance, args, kwargs):
+            try:
+                result = wrapped(*args, **kwargs)
+                if after:
+                    after(instance)
+                return result
+            except Exception as e:
+                if cleanup:
+                    cleanup(instance, e)
+        
+        return wrapt.FunctionWrapper(original, safe_call)
     
-    def safe_update(self):
-        """安全的更新方法"""
-        try:
-            original_update(self)
-            
-            # 处理紧急恢复
-            if hasattr(self, 'emergency_recovery_timer') and self.emergency_recovery_timer > 0:
-                self.emergency_recovery_timer -= self.clock.get_time()
-                if self.emergency_recovery_timer <= 0:
-                    print("🔧 [修复] 执行紧急恢复")
-                    delattr(self, 'emergency_recovery_timer')
-                    # 尝试重新开始准备阶段
-                    try:
-                        self.game_state.set_current_phase("preparation")
-                        self.start_preparation_phase()
-                    except:
-                        pass
-                        
-        except Exception as e:
-            print(f"🔧 [修复] 更新异常: {e}")
-            # 不让异常传播，保持游戏运行
-            pass
+    orig_attr = "_orig_" + name
     
-    def safe_handle_events(self):
-        """安全的事件处理"""
+    def wrapper(self, *args, **kwargs):
         try:
-            original_handle_events(self)
+            result = getattr(self, orig_attr)(*args, **kwargs)
+            if after:
+                after(self)
+            return result
         except Exception as e:
-            print(f"🔧 [修复] 事件处理异常: {e}")
-            # 清理有问题的事件，但不崩溃
-            import pygame
-            pygame.event.clear()
+            if cleanup:
+                cleanup(self, e)
     
-    # 应用补丁
-    MainWindow.execute_settlement = safe_execute_settlement
-    MainWindow.advance_phase = safe_advance_phase
-    MainWindow.update = safe_update
-    MainWindow.handle_events = safe_handle_events
+    wrapper.__name__ = name
+    wrapper.__doc__ = original.__doc__
+    wrapper.__wrapped__ = original
+    return wrapper
+
+def patch_main_window():
+    """修复MainWindow中的崩溃问题"""
+    from src.ui.main_window import MainWindow
     
-    print("🔧 [修复] 游戏崩溃修复补丁已应用")
+    # 原始方法保存为MainWindow._orig_<name>，重复打补丁时保留最初的版本
+    for name, after, cleanup in _SAFE_METHODS:
+        orig_attr = "_orig_" + name
+        if not hasattr(MainWindow, orig_attr):
+            setattr(MainWindow, orig_attr, getattr(MainWindow, name))
+        setattr(MainWindow, name, _safe_dispatch(name, getattr(MainWindow, orig_attr), after, cleanup))
+    
+    logger.info("游戏崩溃修复补丁已应用")
 
 def patch_bank_window():
     """修复银行窗口的问题"""
     try:
         from src.ui.main_window import MainWindow
         
-        original_close_bank = MainWindow.close_bank
-        
         def safe_close_bank(self):
             """安全的银行关闭"""
-            print("🔧 [修复] 银行窗口安全关闭")
+            logger.debug("银行窗口安全关闭")
             try:
                 if self.bank_window:
                     self.bank_window.hide()
                 
                 # 只有在结算阶段才推进
                 if self.game_state.current_phase == "settlement":
-                    print("🔧 [修复] 结算阶段银行关闭，推进阶段")
+                    logger.debug("结算阶段银行关闭，推进阶段")
                     self.advance_phase()
                 else:
-                    print(f"🔧 [修复] 当前阶段是 {self.game_state.current_phase}，不推进")
+                    logger.debug("当前阶段是 %s，不推进", self.game_state.current_phase)
                     
             except Exception as e:
-                print(f"🔧 [修复] 银行关闭异常: {e}")
+                logger.warning("银行关闭异常: %s", e)
                 # 不让异常传播
                 pass
         
         MainWindow.close_bank = safe_close_bank
-        print("🔧 [修复] 银行窗口修复补丁已应用")
+        logger.info("银行窗口修复补丁已应用")
         
     except ImportError:
-        print("🔧 [修复] 银行窗口模块未找到，跳过修复")
+        logger.warning("银行窗口模块未找到，跳过修复")
 
 def apply_all_fixes():
     """应用所有修复"""
     print("🔧 开始应用游戏崩溃修复...")
     
+    # 真正的硬崩溃（段错误等）由faulthandler输出底层堆栈
+    if not faulthandler.is_enabled():
+        faulthandler.enable()
+    
     try:
         patch_main_window()
         patch_bank_window()
@@ -10,41 +10,25 @@ import traceback
 # 添加src目录到路径
 sys.path.append('src')
 
+from _debug_util import feed_events, pygame_event_get, short_stack
+
+def _report_scene_change(self):
+    """在场景切换点检查并输出场景变化"""
+    # 场景名均为字符串字面量（已驻留），用身份比较即可
+    current_scene = self.current_scene
+    if current_scene is not self._debug_last_scene:
+        print(f"🔄 [SCENE] 场景变化: {self._debug_last_scene} -> {current_scene}")
+        print(f"   - 多人游戏: {getattr(self, 'is_multiplayer', False)}")
+        self._debug_last_scene = current_scene
+
 def patch_all_event_handlers():
-    """给所有可能的事件处理器添加调试补丁"""
+    """给场景切换相关的方法添加调试补丁（不拦截每帧调用的handle_events/draw）"""
     
-    # 补丁MainWindow
     from src.ui.main_window import MainWindow
-    original_handle_events = MainWindow.handle_events
-    original_draw = MainWindow.draw
-    
-    def debug_handle_events(self):
-        """调试版handle_events"""
-        try:
-            return original_handle_events(self)
-        except Exception as e:
-            print(f"🚨 [ERROR] MainWindow.handle_events异常: {e}")
-            traceback.print_exc()
-    
-    def debug_draw(self):
-        """调试版draw"""
-        # 记录状态变化
-        if not hasattr(self, '_debug_last_scene'):
-            self._debug_last_scene = self.current_scene
-        
-        if self._debug_last_scene != self.current_scene:
-            print(f"🔄 [SCENE] 场景变化: {self._debug_last_scene} -> {self.current_scene}")
-            print(f"   - 多人游戏: {getattr(self, 'is_multiplayer', False)}")
-            self._debug_last_scene = self.current_scene
-        
-        try:
-            return original_draw(self)
-        except Exception as e:
-            print(f"🚨 [ERROR] MainWindow.draw异常: {e}")
-            traceback.print_exc()
+    from src.ui.exc_report import report_exception
     
-    MainWindow.handle_events = debug_handle_events
-    MainWindow.draw = debug_draw
+    # 类属性作为初始值，实例首次记录场景后覆盖
+    MainWindow._debug_last_scene = None
     
     # 补丁MapView
     try:
@@ -62,7 +46,7 @@ def patch_all_event_handlers():
                 return result
             except Exception as e:
                 print(f"🚨 [ERROR] MapView.handle_event异常: {e}")
-                traceback.print_exc()
+                report_exception(e)
                 return False
         
         MapView.handle_event = debug_map_handle_event
@@ -73,37 +57,50 @@ def patch_all_event_handlers():
     original_init_menu = MainWindow.init_menu_scene
     original_init_setup = MainWindow.init_game_setup_scene
     original_return_menu = MainWindow.return_to_menu
+    original_init_game = MainWindow.init_game_scene
     
     def debug_init_menu(self):
         print(f"🚨 [CALL] init_menu_scene被调用！")
         print(f"   - 当前场景: {self.current_scene}")
         print(f"   - 多人游戏: {getattr(self, 'is_multiplayer', False)}")
         print(f"   - 调用栈:")
-        for line in traceback.format_stack()[-5:]:
-            print(f"     {line.strip()}")
-        return original_init_menu(self)
+        for line in short_stack(5):
+            print(f"     {line}")
+        result = original_init_menu(self)
+        _report_scene_change(self)
+        return result
     
     def debug_init_setup(self):
         print(f"🚨 [CALL] init_game_setup_scene被调用！")
         print(f"   - 当前场景: {self.current_scene}")
         print(f"   - 多人游戏: {getattr(self, 'is_multiplayer', False)}")
         print(f"   - 调用栈:")
-        for line in traceback.format_stack()[-5:]:
-            print(f"     {line.strip()}")
-        return original_init_setup(self)
+        for line in short_stack(5):
+            print(f"     {line}")
+        result = original_init_setup(self)
+        _report_scene_change(self)
+        return result
     
     def debug_return_menu(self):
         print(f"🚨 [CALL] return_to_menu被调用！")
         print(f"   - 当前场景: {self.current_scene}")
         print(f"   - 多人游戏: {getattr(self, 'is_multiplayer', False)}")
         print(f"   - 调用栈:")
-        for line in traceback.format_stack()[-5:]:
-            print(f"     {line.strip()}")
-        return original_return_menu(self)
+        for line in short_stack(5):
+            print(f"     {line}")
+        result = original_return_menu(self)
+        _report_scene_change(self)
+        return result
+    
+    def debug_init_game(self):
+        result = original_init_game(self)
+        _report_scene_change(self)
+        return result
     
     MainWindow.init_menu_scene = debug_init_menu
     MainWindow.init_game_setup_scene = debug_init_setup
     MainWindow.return_to_menu = debug_return_menu
+    MainWindow.init_game_scene = debug_init_game
     
     print("🔧 深度调试补丁已应用")
 
@@ -161,6 +158,12 @@ def run_interactive_test():
         
         # 创建主窗口
         main_window = MainWindow()
+        # 只让调试循环和游戏逻辑用到的事件进入SDL队列（含延迟移动和音乐结束事件）
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed([
+            pygame.QUIT, pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN,
+            pygame.USEREVENT + 1, main_window.music_system.MUSIC_END_EVENT
+        ])
         
         # 设置多人游戏模式
         main_window.is_multiplayer = True
@@ -195,8 +198,9 @@ def run_interactive_test():
             if frame_count % 60 == 0:
                 print(f"📊 [STATUS] 帧:{frame_count}, 场景:{main_window.current_scene}, 按钮数:{len(main_window.buttons)}")
             
-            # 处理事件
-            for event in pygame.event.get():
+            # 处理事件（每帧只取一次，同一批事件再交给handle_events）
+            events = pygame_event_get()
+            for event in events:
                 if event.type == pygame.QUIT:
                     running = False
                     break
@@ -208,6 +212,7 @@ def run_interactive_test():
                     print(f"🖱️ [CLICK] 鼠标点击: {event.pos}, 按钮: {event.button}")
             
             # 正常游戏循环
+            feed_events(events)
             main_window.handle_events()
             main_window.update()
             main_window.draw()
@@ -225,10 +230,10 @@ def run_interactive_test():
         except:
             pass
 
+# 命令行模式 -> 入口函数，未知或缺省模式运行深度调试
+_MODES = {
+    "interactive": run_interactive_test,
+}
+
 if __name__ == "__main__":
-    import sys
-    
-    if len(sys.argv) > 1 and sys.argv[1] == "interactive":
-        run_interactive_test()
-    else:
-        test_deep_debugging() 
\ No newline at end of file
+    _MODES.get(sys.argv[1] if len(sys.argv) > 1 else "", test_deep_debugging)()
@@ -9,6 +9,8 @@ import traceback
 # 添加src目录到路径
 sys.path.append('src')
 
+from _debug_util import feed_events, pygame_event_get, short_stack
+
 def patch_init_game_scene():
     """给init_game_scene添加调试补丁"""
     
@@ -17,13 +19,16 @@ def patch_init_game_scene():
     
     def debug_init_game_scene(self):
         """调试版init_game_scene"""
-        print(f"🎮 [CALL] init_game_scene被调用！")
-        print(f"   - 当前场景: {self.current_scene}")
-        print(f"   - 多人游戏: {getattr(self, 'is_multiplayer', False)}")
-        print(f"   - 当前按钮数: {len(self.buttons)}")
-        print(f"   - 调用栈:")
-        for line in traceback.format_stack()[-8:]:
-            print(f"     {line.strip()}")
+        # 输出先拼成一个字符串再一次性写入，调用原方法前后各写一次
+        buf = [
+            "🎮 [CALL] init_game_scene被调用！\n",
+            f"   - 当前场景: {self.current_scene}\n",
+            f"   - 多人游戏: {getattr(self, 'is_multiplayer', False)}\n",
+            f"   - 当前按钮数: {len(self.buttons)}\n",
+            "   - 调用栈:\n",
+        ]
+        buf.extend(f"     {line}\n" for line in short_stack(8))
+        sys.stdout.write("".join(buf))
         
         # 记录调用前的状态
         buttons_before = len(self.buttons)
@@ -36,15 +41,26 @@ def patch_init_game_scene():
         buttons_after = len(self.buttons)
         panels_after = len(self.panels)
         
-        print(f"   - 按钮变化: {buttons_before} -> {buttons_after}")
-        print(f"   - 面板变化: {panels_before} -> {panels_after}")
+        buf = [
+            f"   - 按钮变化: {buttons_before} -> {buttons_after}\n",
+            f"   - 面板变化: {panels_before} -> {panels_after}\n",
+        ]
         
-        # 列出当前按钮
+        # 列出当前按钮（按钮很多时只列出首尾各3个）
         if self.buttons:
-            print(f"   - 当前按钮:")
-            for i, button in enumerate(self.buttons):
-                button_text = getattr(button, 'text', 'No text')
-                print(f"     [{i}] {button_text}")
+            buf.append("   - 当前按钮:\n")
+            count = len(self.buttons)
+            if count > 6:
+                indices = (0, 1, 2, None, count - 3, count - 2, count - 1)
+            else:
+                indices = range(count)
+            for i in indices:
+                if i is None:
+                    buf.append(f"     ... 省略 {count - 6} 个按钮 ...\n")
+                    continue
+                button_text = getattr(self.buttons[i], 'text', 'No text')
+                buf.append(f"     [{i}] {button_text}\n")
+        sys.stdout.write("".join(buf))
         
         return result
     
@@ -63,6 +79,12 @@ def run_init_game_scene_test():
         
         # 创建主窗口
         main_window = MainWindow()
+        # 只让调试循环和游戏逻辑用到的事件进入SDL队列（含延迟移动和音乐结束事件）
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed([
+            pygame.QUIT, pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN,
+            pygame.USEREVENT + 1, main_window.music_system.MUSIC_END_EVENT
+        ])
         
         # 设置多人游戏模式
         main_window.is_multiplayer = True
@@ -94,8 +116,9 @@ def run_init_game_scene_test():
         while frame_count < 300:  # 运行5秒 (60fps * 5)
             frame_count += 1
             
-            # 处理pygame事件
-            for event in pygame.event.get():
+            # 处理pygame事件（每帧只取一次，同一批事件再交给handle_events）
+            events = pygame_event_get()
+            for event in events:
                 if event.type == pygame.QUIT:
                     print("🛑 收到退出事件")
                     break
@@ -103,6 +126,7 @@ def run_init_game_scene_test():
                     print(f"🖱️ 鼠标点击: {event.pos}")
             
             # 正常游戏循环
+            feed_events(events)
             main_window.handle_events()
             main_window.update()
             main_window.draw()
@@ -22,6 +22,10 @@ class DebugMapEditorGUI:
         self.root.title("调试版地图编辑器")
         self.root.geometry("800x600")
         
+        # 日志缓冲：同一轮事件循环内的日志合并为一次插入
+        self._log_buf = []
+        self._log_flush_scheduled = False
+        
         self.setup_ui()
     
     def setup_ui(self):
@@ -46,7 +50,9 @@ class DebugMapEditorGUI:
         log_frame = ttk.LabelFrame(main_frame, text="调试日志")
         log_frame.pack(fill=tk.BOTH, expand=True, pady=10)
         
-        self.log_text = tk.Text(log_frame, height=20)
+        # 只读日志：关闭撤销栈，写入之间保持disabled
+        self.log_text = tk.Text(log_frame, height=20, undo=False, autoseparators=False,
+                                maxundo=0, state='disabled')
         scrollbar = ttk.Scrollbar(log_frame, orient=tk.VERTICAL, command=self.log_text.yview)
         self.log_text.configure(yscrollcommand=scrollbar.set)
         
@@ -57,14 +63,30 @@ class DebugMapEditorGUI:
         ttk.Button(main_frame, text="清空日志", command=self.clear_log).pack(pady=5)
     
     def log(self, message):
-        """添加日志"""
-        self.log_text.insert(tk.END, f"{message}\n")
-        self.log_text.see(tk.END)
+        """添加日志（在空闲时批量写入日志区域）"""
+        self._log_buf.append(message)
+        if not self._log_flush_scheduled:
+            self._log_flush_scheduled = True
+            self.root.after_idle(self._flush_log)
         print(message)  # 同时输出到控制台
     
+    def _flush_log(self):
+        """将缓冲的日志一次性写入日志区域"""
+        self._log_flush_scheduled = False
+        if not self._log_buf:
+            return
+        self.log_text.configure(state='normal')
+        self.log_text.insert(tk.END, "\n".join(self._log_buf) + "\n")
+        self.log_text.configure(state='disabled')
+        self.log_text.see(tk.END)
+        self._log_buf.clear()
+    
     def clear_log(self):
         """清空日志"""
+        self._log_buf.clear()
+        self.log_text.configure(state='normal')
         self.log_text.delete(1.0, tk.END)
+        self.log_text.configure(state='disabled')
     
     def debug_new_map(self):
         """调试新建地图功能"""
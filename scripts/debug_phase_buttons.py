@@ -4,11 +4,37 @@
 """
 import pygame
 import sys
+import time
+import logging
+import logging.handlers
+import threading
 import traceback
 
 # 添加src目录到路径
 sys.path.append('src')
 
+from _debug_util import feed_events, pygame_event_get, short_stack
+
+# 调试日志：默认只输出WARNING及以上，直接运行本脚本时切换到DEBUG；
+# 低于当前级别的调用不会格式化参数。记录先缓存在内存中（WARNING及以上立即输出），
+# 由后台线程定期格式化并写到控制台，游戏循环里不做控制台I/O
+log = logging.getLogger("debug_phase_buttons")
+if not log.handlers:
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    log.addHandler(logging.handlers.MemoryHandler(4096, flushLevel=logging.WARNING, target=_handler))
+    log.propagate = False
+log.setLevel(logging.WARNING)
+
+def _start_log_flusher(interval=1.0):
+    """启动后台线程，每interval秒输出一次缓存的调试日志"""
+    def flush_loop():
+        while True:
+            time.sleep(interval)
+            for handler in log.handlers:
+                handler.flush()
+    threading.Thread(target=flush_loop, name="debug_phase_buttons-log", daemon=True).start()
+
 def patch_phase_buttons():
     """给phase_buttons相关方法添加调试补丁"""
     
@@ -19,93 +45,92 @@ def patch_phase_buttons():
     original_show_action_choices = MainWindow.show_action_choices
     original_ai_action_decision = MainWindow.ai_action_decision
     
-    def debug_show_preparation_choices(self):
-        """调试版show_preparation_choices"""
-        print(f"🎯 [CALL] show_preparation_choices被调用！")
-        print(f"   - 多人游戏: {getattr(self, 'is_multiplayer', False)}")
-        print(f"   - 当前阶段按钮数: {len(self.phase_buttons)}")
-        print(f"   - 调用栈:")
-        for line in traceback.format_stack()[-5:]:
-            print(f"     {line.strip()}")
-        
-        result = original_show_preparation_choices(self)
-        
-        print(f"   - 执行后阶段按钮数: {len(self.phase_buttons)}")
-        if self.phase_buttons:
-            print(f"   - 新增按钮:")
-            for i, button in enumerate(self.phase_buttons):
-                button_text = getattr(button, 'text', 'No text')
-                print(f"     [{i}] {button_text}")
-        
-        return result
-    
-    def debug_show_action_choices(self):
-        """调试版show_action_choices"""
-        print(f"🎯 [CALL] show_action_choices被调用！")
-        print(f"   - 多人游戏: {getattr(self, 'is_multiplayer', False)}")
-        print(f"   - 当前阶段按钮数: {len(self.phase_buttons)}")
-        print(f"   - 调用栈:")
-        for line in traceback.format_stack()[-5:]:
-            print(f"     {line.strip()}")
-        
-        result = original_show_action_choices(self)
-        
-        print(f"   - 执行后阶段按钮数: {len(self.phase_buttons)}")
-        if self.phase_buttons:
-            print(f"   - 新增按钮:")
-            for i, button in enumerate(self.phase_buttons):
-                button_text = getattr(button, 'text', 'No text')
-                print(f"     [{i}] {button_text}")
+    def trace_choices(name, original):
+        """生成记录调用前后阶段按钮变化的调试版show_*_choices"""
+        def debug_choices(self):
+            if not log.isEnabledFor(logging.DEBUG):
+                return original(self)
+            
+            log.debug("🎯 [CALL] %s被调用！", name)
+            log.debug("   - 多人游戏: %s", getattr(self, 'is_multiplayer', False))
+            log.debug("   - 当前阶段按钮数: %d", len(self.phase_buttons))
+            log.debug("   - 调用栈:")
+            for line in short_stack():
+                log.debug("     %s", line)
+            
+            result = original(self)
+            
+            log.debug("   - 执行后阶段按钮数: %d", len(self.phase_buttons))
+            if self.phase_buttons:
+                log.debug("   - 新增按钮:")
+                for i, button in enumerate(self.phase_buttons):
+                    log.debug("     [%d] %s", i, getattr(button, 'text', 'No text'))
+            
+            return result
         
-        return result
+        debug_choices.__name__ = name
+        return debug_choices
     
     def debug_ai_action_decision(self, player):
         """调试版ai_action_decision"""
-        print(f"🤖 [CALL] ai_action_decision被调用！玩家: {player.name}")
-        print(f"   - 多人游戏: {getattr(self, 'is_multiplayer', False)}")
-        print(f"   - 当前阶段按钮数: {len(self.phase_buttons)}")
+        log.debug("🤖 [CALL] ai_action_decision被调用！玩家: %s", player.name)
+        log.debug("   - 多人游戏: %s", getattr(self, 'is_multiplayer', False))
+        log.debug("   - 当前阶段按钮数: %d", len(self.phase_buttons))
         
         result = original_ai_action_decision(self, player)
         
-        print(f"   - AI决策后阶段按钮数: {len(self.phase_buttons)}")
+        log.debug("   - AI决策后阶段按钮数: %d", len(self.phase_buttons))
         
         return result
     
-    # 补丁清理方法
-    original_clear = list.clear
-    
-    def debug_clear(self):
-        """调试版clear"""
-        # 只在是phase_buttons时打印
-        if hasattr(self, '__name__') and 'phase_buttons' in str(self):
-            print(f"🧹 [CLEAR] phase_buttons被清理！")
-            print(f"   - 清理前按钮数: {len(self)}")
-            print(f"   - 调用栈:")
-            for line in traceback.format_stack()[-5:]:
-                print(f"     {line.strip()}")
-        return original_clear(self)
-    
     # 不能直接替换list.clear，因为会影响所有list
     # 而是创建一个专门的追踪函数
     def track_phase_buttons_clear(main_window):
         """追踪特定main_window的phase_buttons清理"""
         original_phase_buttons = main_window.phase_buttons
         
-        class TrackedList(list):
+        class TrackedList:
+            """包装普通list，只有clear带调试输出，其余操作直接转给内部list"""
+            __slots__ = ('_data', '_owner')
+            
+            def __init__(self, data, owner):
+                self._data = data
+                self._owner = owner
+            
+            def __len__(self):
+                return len(self._data)
+            
+            def __iter__(self):
+                return iter(self._data)
+            
+            def __getitem__(self, index):
+                return self._data[index]
+            
+            def __contains__(self, item):
+                return item in self._data
+            
+            def append(self, item):
+                self._data.append(item)
+            
+            def extend(self, items):
+                self._data.extend(items)
+            
             def clear(self):
-                print(f"🧹 [CLEAR] phase_buttons被清理！")
-                print(f"   - 清理前按钮数: {len(self)}")
-                print(f"   - 调用栈:")
-                for line in traceback.format_stack()[-5:]:
-                    print(f"     {line.strip()}")
-                return super().clear()
-        
-        # 替换phase_buttons为追踪版本
-        tracked_buttons = TrackedList(original_phase_buttons)
+                if log.isEnabledFor(logging.DEBUG):
+                    log.debug("🧹 [CLEAR] phase_buttons被清理！")
+                    log.debug("   - 清理前按钮数: %d", len(self._data))
+                    log.debug("   - 调用栈:")
+                    for line in short_stack():
+                        log.debug("     %s", line)
+                self._data.clear()
+                self._owner._dirty = True
+        
+        # 替换phase_buttons为追踪版本（内部仍是原来的list）
+        tracked_buttons = TrackedList(original_phase_buttons, main_window)
         main_window.phase_buttons = tracked_buttons
     
-    MainWindow.show_preparation_choices = debug_show_preparation_choices
-    MainWindow.show_action_choices = debug_show_action_choices
+    MainWindow.show_preparation_choices = trace_choices("show_preparation_choices", original_show_preparation_choices)
+    MainWindow.show_action_choices = trace_choices("show_action_choices", original_show_action_choices)
     MainWindow.ai_action_decision = debug_ai_action_decision
     
     print("🔧 phase_buttons调试补丁已应用")
@@ -152,30 +177,50 @@ def run_phase_buttons_test():
         # 模拟一些游戏循环来触发阶段按钮变化
         print("🎮 开始事件循环...")
         clock = pygame.time.Clock()
-        frame_count = 0
-        
-        while frame_count < 180:  # 运行3秒
-            frame_count += 1
-            
-            # 处理pygame事件
-            for event in pygame.event.get():
+        main_window._dirty = True
+        last_ui_state = None
+        
+        # 由定时器事件结束循环和触发状态检查（USEREVENT+1已被延迟移动使用）
+        stop_event = pygame.USEREVENT + 3
+        status_event = pygame.USEREVENT + 4
+        start_ticks = pygame.time.get_ticks()
+        pygame.time.set_timer(stop_event, 3000, loops=1)  # 运行3秒
+        pygame.time.set_timer(status_event, 500)  # 每0.5秒检查一次状态
+        running = True
+        
+        while running:
+            # 处理pygame事件（每帧只取一次，之后交给handle_events）
+            events = pygame_event_get()
+            for event in events:
                 if event.type == pygame.QUIT:
                     print("🛑 收到退出事件")
-                    break
+                    running = False
+                elif event.type == stop_event:
+                    running = False
+                elif event.type == status_event:
+                    print(f"📊 [检查] {pygame.time.get_ticks() - start_ticks}ms, 阶段按钮数:{len(main_window.phase_buttons)}")
                 elif event.type == pygame.MOUSEBUTTONDOWN:
                     print(f"🖱️ 鼠标点击: {event.pos}")
+            if not running:
+                break
             
             # 正常游戏循环
+            feed_events(events)
             main_window.handle_events()
             main_window.update()
-            main_window.draw()
             
-            # 每30帧检查一次状态
-            if frame_count % 30 == 0:
-                print(f"📊 [检查] 帧:{frame_count}, 阶段按钮数:{len(main_window.phase_buttons)}")
+            # 只有界面状态变化、阶段按钮被清理或有输入事件时才重绘
+            ui_state = (main_window.current_scene, len(main_window.buttons), len(main_window.phase_buttons))
+            if events or ui_state != last_ui_state:
+                main_window._dirty = True
+                last_ui_state = ui_state
+            if main_window._dirty:
+                main_window.draw()
+                main_window._dirty = False
             
             clock.tick(60)
         
+        pygame.time.set_timer(status_event, 0)
         pygame.quit()
         print("🎉 phase_buttons调试测试完成")
         
@@ -188,4 +233,6 @@ def run_phase_buttons_test():
             pass
 
 if __name__ == "__main__":
+    log.setLevel(logging.DEBUG)
+    _start_log_flusher()
     run_phase_buttons_test() 
\ No newline at end of file
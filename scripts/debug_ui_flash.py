@@ -6,11 +6,50 @@ UI闪烁问题调试工具
 import pygame
 import sys
 import time
+import logging
+import logging.handlers
+import threading
 import traceback
 
 # 添加src目录到路径
 sys.path.append('src')
 
+from _debug_util import feed_events, pygame_event_get, short_stack
+
+# 调试日志：默认只输出WARNING及以上，直接运行本脚本时切换到DEBUG；
+# 低于当前级别的调用不会格式化参数。记录先缓存在内存中（WARNING及以上立即输出），
+# 由后台线程定期格式化并写到控制台，游戏循环里不做控制台I/O
+log = logging.getLogger("debug_ui_flash")
+if not log.handlers:
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    log.addHandler(logging.handlers.MemoryHandler(4096, flushLevel=logging.WARNING, target=_handler))
+    log.propagate = False
+log.setLevel(logging.WARNING)
+
+def _start_log_flusher(interval=1.0):
+    """启动后台线程，每interval秒输出一次缓存的调试日志"""
+    def flush_loop():
+        while True:
+            time.sleep(interval)
+            for handler in log.handlers:
+                handler.flush()
+    threading.Thread(target=flush_loop, name="debug_ui_flash-log", daemon=True).start()
+
+# 点击时需要报告的按钮文字
+_SUSPICIOUS_BUTTONS = frozenset(("返回菜单", "开始游戏", "联机模式"))
+
+def _report_scene_call(window, name):
+    """打印场景切换方法被调用时的状态和调用栈"""
+    if not log.isEnabledFor(logging.DEBUG):
+        return
+    log.debug("🚨 [调试] %s被调用!", name)
+    log.debug("  - 当前场景: %s", window.current_scene)
+    log.debug("  - 是否多人游戏: %s", getattr(window, 'is_multiplayer', False))
+    log.debug("  - 调用堆栈:")
+    for line in short_stack(6)[1:]:
+        log.debug("    %s", line)
+
 def monkey_patch_main_window():
     """给MainWindow添加调试补丁"""
     from src.ui.main_window import MainWindow
@@ -23,77 +62,72 @@ def monkey_patch_main_window():
     
     def debug_init_menu_scene(self):
         """调试版init_menu_scene"""
-        print(f"🚨 [调试] init_menu_scene被调用!")
-        print(f"  - 当前场景: {self.current_scene}")
-        print(f"  - 是否多人游戏: {getattr(self, 'is_multiplayer', False)}")
-        print(f"  - 调用堆栈:")
-        traceback.print_stack()
+        _report_scene_call(self, "init_menu_scene")
         
         # 如果是多人游戏模式，阻止切换到菜单场景
         if getattr(self, 'is_multiplayer', False):
-            print(f"  ⚠️ 多人游戏模式下阻止切换到菜单场景!")
+            log.warning("  ⚠️ 多人游戏模式下阻止切换到菜单场景!")
             return
         
         return original_init_menu_scene(self)
     
     def debug_return_to_menu(self):
         """调试版return_to_menu"""
-        print(f"🚨 [调试] return_to_menu被调用!")
-        print(f"  - 当前场景: {self.current_scene}")
-        print(f"  - 是否多人游戏: {getattr(self, 'is_multiplayer', False)}")
-        print(f"  - 调用堆栈:")
-        traceback.print_stack()
+        _report_scene_call(self, "return_to_menu")
         
         return original_return_to_menu(self)
     
     def debug_handle_events(self):
         """调试版handle_events"""
-        # 检查按钮点击
-        for event in pygame.event.get():
+        # 未开启调试输出或队列里没有鼠标点击时无需检查，直接交给原始handle_events
+        if not log.isEnabledFor(logging.DEBUG) or not pygame.event.peek(pygame.MOUSEBUTTONDOWN):
+            return original_handle_events(self)
+        
+        # 取出本帧事件，检查按钮点击后原样交给原始handle_events，不再逐个放回队列
+        events = pygame_event_get()
+        for event in events:
             if event.type == pygame.MOUSEBUTTONDOWN:
-                mouse_pos = pygame.mouse.get_pos()
+                mouse_pos = event.pos
                 
                 # 检查是否点击了问题按钮
                 for button in self.buttons:
                     if hasattr(button, 'rect') and button.rect.collidepoint(mouse_pos):
-                        if hasattr(button, 'text') and button.text in ["返回菜单", "开始游戏", "联机模式"]:
-                            print(f"🚨 [调试] 点击了可疑按钮: {button.text}")
-                            print(f"  - 当前场景: {self.current_scene}")
-                            print(f"  - 是否多人游戏: {getattr(self, 'is_multiplayer', False)}")
-                            print(f"  - 按钮回调: {button.callback}")
+                        if getattr(button, 'text', None) in _SUSPICIOUS_BUTTONS:
+                            log.debug("🚨 [调试] 点击了可疑按钮: %s", button.text)
+                            log.debug("  - 当前场景: %s", self.current_scene)
+                            log.debug("  - 是否多人游戏: %s", getattr(self, 'is_multiplayer', False))
+                            log.debug("  - 按钮回调: %s", button.callback)
                         break
-            
-            # 将事件重新放回队列
-            pygame.event.post(event)
         
+        feed_events(events)
         return original_handle_events(self)
     
     def debug_draw(self):
         """调试版draw"""
-        # 检查场景变化
-        if not hasattr(self, '_last_scene'):
+        # 检查场景变化（类属性默认值None表示第一次绘制，只记录不报告）
+        last_scene = self._last_scene
+        if last_scene != self.current_scene:
+            if last_scene is not None:
+                log.debug("🚨 [调试] 场景切换: %s -> %s", last_scene, self.current_scene)
+                log.debug("  - 是否多人游戏: %s", getattr(self, 'is_multiplayer', False))
             self._last_scene = self.current_scene
         
-        if self._last_scene != self.current_scene:
-            print(f"🚨 [调试] 场景切换: {self._last_scene} -> {self.current_scene}")
-            print(f"  - 是否多人游戏: {getattr(self, 'is_multiplayer', False)}")
-            self._last_scene = self.current_scene
-        
-        # 检查按钮数量变化
-        if not hasattr(self, '_last_button_count'):
-            self._last_button_count = len(self.buttons)
-        
-        if self._last_button_count != len(self.buttons):
-            print(f"🚨 [调试] 按钮数量变化: {self._last_button_count} -> {len(self.buttons)}")
-            print(f"  - 当前按钮:")
-            for i, button in enumerate(self.buttons):
-                button_text = getattr(button, 'text', '未知')
-                print(f"    {i+1}. {button_text}")
-            self._last_button_count = len(self.buttons)
+        # 检查按钮数量变化（-1表示第一次绘制）
+        last_count = self._last_button_count
+        button_count = len(self.buttons)
+        if last_count != button_count:
+            if last_count != -1 and log.isEnabledFor(logging.DEBUG):
+                log.debug("🚨 [调试] 按钮数量变化: %d -> %d", last_count, button_count)
+                log.debug("  - 当前按钮:")
+                for i, button in enumerate(self.buttons, 1):
+                    log.debug("    %d. %s", i, getattr(button, 'text', '未知'))
+            self._last_button_count = button_count
         
         return original_draw(self)
     
-    # 应用补丁
+    # 应用补丁（场景/按钮数记录用类属性提供初始值，绘制时无需hasattr探测）
+    MainWindow._last_scene = None
+    MainWindow._last_button_count = -1
     MainWindow.init_menu_scene = debug_init_menu_scene
     MainWindow.return_to_menu = debug_return_to_menu
     MainWindow.handle_events = debug_handle_events
@@ -172,4 +206,6 @@ def test_multiplayer_ui_issue():
             pass
 
 if __name__ == "__main__":
+    log.setLevel(logging.DEBUG)
+    _start_log_flusher()
     test_multiplayer_ui_issue() 
\ No newline at end of file
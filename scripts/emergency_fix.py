@@ -5,14 +5,25 @@
 import sys
 import os
 
+# 设置环境变量EMERGENCY_FIX_DEBUG后才输出正常路径的过程日志
+_DEBUG = bool(os.environ.get("EMERGENCY_FIX_DEBUG"))
+
+# 结算阶段需要检查的窗口属性及提示名称（按检查顺序）
+_WINDOW_ATTRS = ('bank_window', 'item_shop_window', 'dice_shop_window', 'property_window')
+_WINDOW_LABELS = ('银行', '道具商店', '骰子商店', '房产')
+
 def apply_emergency_patches():
     """应用紧急修复补丁"""
     print("🚨 开始应用紧急修复...")
     
     # 导入必要的模块
     try:
-        sys.path.append('src')
-        from ui.main_window import MainWindow
+        # 与main()使用同一个模块路径，补丁才会作用到实际运行的MainWindow
+        if '.' not in sys.path:
+            sys.path.insert(0, '.')
+        from src.ui.main_window import MainWindow
+        # 同一位置抛出的同类异常每秒最多打印一次堆栈
+        from src.ui.exc_report import report_exception
         print("✅ 成功导入MainWindow")
     except Exception as e:
         print(f"❌ 导入失败: {e}")
@@ -22,13 +33,14 @@ def apply_emergency_patches():
     original_execute_settlement = MainWindow.execute_settlement
     def safe_execute_settlement(self):
         try:
-            print("🔧 [安全修复] 开始安全结算")
+            if _DEBUG:
+                print("🔧 [安全修复] 开始安全结算")
             original_execute_settlement(self)
-            print("🔧 [安全修复] 结算完成")
+            if _DEBUG:
+                print("🔧 [安全修复] 结算完成")
         except Exception as e:
             print(f"🔧 [安全修复] 结算异常: {e}")
-            import traceback
-            traceback.print_exc()
+            report_exception(e)
             try:
                 current_player = self.game_state.get_current_player()
                 if current_player:
@@ -41,13 +53,14 @@ def apply_emergency_patches():
     original_advance_phase = MainWindow.advance_phase
     def safe_advance_phase(self):
         try:
-            print("🔧 [安全修复] 开始安全阶段推进")
+            if _DEBUG:
+                print("🔧 [安全修复] 开始安全阶段推进")
             original_advance_phase(self)
-            print("🔧 [安全修复] 阶段推进完成")
+            if _DEBUG:
+                print("🔧 [安全修复] 阶段推进完成")
         except Exception as e:
             print(f"🔧 [安全修复] 阶段推进异常: {e}")
-            import traceback
-            traceback.print_exc()
+            report_exception(e)
             # 设置紧急恢复
             self.phase_auto_advance = False
             self.phase_timer = 0
@@ -70,18 +83,12 @@ def apply_emergency_patches():
         # 检查是否有UI窗口打开
         has_open_window = False
         
-        if hasattr(self, 'bank_window') and self.bank_window and getattr(self.bank_window, 'visible', False):
-            has_open_window = True
-            print("🔧 [智能控制] 银行窗口已打开，暂停自动推进")
-        elif hasattr(self, 'item_shop_window') and self.item_shop_window and getattr(self.item_shop_window, 'visible', False):
-            has_open_window = True
-            print("🔧 [智能控制] 道具商店窗口已打开，暂停自动推进")
-        elif hasattr(self, 'dice_shop_window') and self.dice_shop_window and getattr(self.dice_shop_window, 'visible', False):
-            has_open_window = True
-            print("🔧 [智能控制] 骰子商店窗口已打开，暂停自动推进")
-        elif hasattr(self, 'property_window') and self.property_window and getattr(self.property_window, 'visible', False):
-            has_open_window = True
-            print("🔧 [智能控制] 房产窗口已打开，暂停自动推进")
+        for attr, label in zip(_WINDOW_ATTRS, _WINDOW_LABELS):
+            window = getattr(self, attr, None)
+            if window is not None and getattr(window, 'visible', False):
+                has_open_window = True
+                print(f"🔧 [智能控制] {label}窗口已打开，暂停自动推进")
+                break
         
         # 只有在没有窗口打开时才设置自动推进
         if not has_open_window:
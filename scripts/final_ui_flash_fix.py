@@ -10,10 +10,43 @@ import traceback
 # 添加src目录到路径
 sys.path.append('src')
 
+from _debug_util import feed_events, pygame_event_get
+
+# 多人模式下准备/行动阶段按钮的文字组合
+_PREP_SIG = ("更换骰子", "使用道具", "跳过")
+_ACTION_SIG = ("投骰子",)
+
 def apply_final_ui_fix():
     """应用最终的UI闪烁修复"""
     
     from src.ui.main_window import MainWindow
+    from src.ui.components import Button
+    from src.ui.constants import COLORS, WINDOW_WIDTH, WINDOW_HEIGHT
+    from src.models.player import Player
+    from src.systems.map_data_manager import MapDataManager
+    
+    # 补丁应用时只创建一次，各次初始化共用（MapDataManager本身无状态）
+    map_manager = MapDataManager()
+    
+    # 阶段按钮布局：(x, y, 宽, 高, 文字, 回调方法名, 颜色)，颜色为None时使用按钮默认色
+    prep_button_specs = (
+        (WINDOW_WIDTH // 2 - 200, WINDOW_HEIGHT - 200, 120, 40, "更换骰子", "change_dice", None),
+        (WINDOW_WIDTH // 2 - 60, WINDOW_HEIGHT - 200, 120, 40, "使用道具", "use_item", None),
+        (WINDOW_WIDTH // 2 + 80, WINDOW_HEIGHT - 200, 120, 40, "跳过", "skip_preparation", COLORS["warning"]),
+    )
+    action_button_specs = (
+        (WINDOW_WIDTH // 2 - 60, WINDOW_HEIGHT - 200, 120, 40, "投骰子", "roll_dice", COLORS["primary"]),
+    )
+    
+    def create_phase_buttons(self, specs, signature):
+        """按布局表重新创建阶段按钮（一次性extend），并记录签名"""
+        buttons = tuple(
+            Button(x, y, w, h, text, getattr(self, callback_name), color)
+            for x, y, w, h, text, callback_name, color in specs
+        )
+        self.phase_buttons.clear()
+        self.phase_buttons.extend(buttons)
+        self._phase_buttons_signature = (signature, buttons[0])
     
     # 1. 修复重复的清理代码
     original_init_multiplayer_game = MainWindow.init_multiplayer_game
@@ -32,9 +65,6 @@ def apply_final_ui_fix():
             print(f"🗺️ 加载地图文件: {map_file}")
             
             # 使用地图数据管理器加载地图
-            from src.systems.map_data_manager import MapDataManager
-            map_manager = MapDataManager()
-            
             # 尝试加载地图
             map_loaded = False
             for map_path in [map_file, f"data/{map_file}", f"{map_file}"]:
@@ -63,8 +93,6 @@ def apply_final_ui_fix():
             
             players = []
             for i, player_data in enumerate(players_data):
-                from src.models.player import Player
-                
                 player_id = i + 1
                 player_name = player_data.get('name', f'玩家{player_id}')
                 client_id = player_data.get('client_id', '')
@@ -116,7 +144,6 @@ def apply_final_ui_fix():
         
         except Exception as e:
             print(f"❌ 多人游戏初始化异常: {e}")
-            import traceback
             traceback.print_exc()
             self.add_message(f"游戏初始化失败: {e}", "error")
             return False
@@ -127,7 +154,7 @@ def apply_final_ui_fix():
     def optimized_draw(self):
         """优化版的draw方法"""
         # 在多人游戏模式下确保场景正确
-        if hasattr(self, 'is_multiplayer') and self.is_multiplayer and self.current_scene != "game":
+        if self.is_multiplayer and self.current_scene != "game":
             print(f"⚠️ [FIXED] 多人游戏模式下强制纠正场景: {self.current_scene} -> game")
             self.current_scene = "game"
         
@@ -143,7 +170,7 @@ def apply_final_ui_fix():
         except Exception as e:
             print(f"🚨 [FIXED] 事件处理异常被捕获: {e}")
             # 在多人游戏模式下确保界面状态
-            if hasattr(self, 'is_multiplayer') and self.is_multiplayer:
+            if self.is_multiplayer:
                 if self.current_scene != "game":
                     print(f"🔧 [FIXED] 异常后纠正场景: {self.current_scene} -> game")
                     self.current_scene = "game"
@@ -152,41 +179,20 @@ def apply_final_ui_fix():
     original_show_preparation_choices = MainWindow.show_preparation_choices
     original_show_action_choices = MainWindow.show_action_choices
     
+    def phase_buttons_match(self, signature):
+        """阶段按钮是否仍是上次按signature创建的那一组（被清空或替换后失效）"""
+        created = getattr(self, '_phase_buttons_signature', None)
+        buttons = self.phase_buttons
+        return (created is not None and created[0] is signature
+                and len(buttons) == len(signature) and buttons[0] is created[1])
+    
     def stable_show_preparation_choices(self):
         """稳定版的show_preparation_choices"""
         # 在多人游戏模式下，减少不必要的清理
-        if hasattr(self, 'is_multiplayer') and self.is_multiplayer:
+        if self.is_multiplayer:
             # 只有在按钮内容真正需要改变时才清理
-            current_button_texts = [getattr(btn, 'text', '') for btn in self.phase_buttons]
-            expected_texts = ["更换骰子", "使用道具", "跳过"]
-            
-            if current_button_texts != expected_texts:
-                self.phase_buttons.clear()
-                
-                # 重新创建按钮
-                from src.ui.components import Button
-                from src.ui.constants import COLORS, WINDOW_WIDTH, WINDOW_HEIGHT
-                
-                # 更换骰子按钮
-                dice_button = Button(
-                    WINDOW_WIDTH // 2 - 200, WINDOW_HEIGHT - 200, 120, 40,
-                    "更换骰子", self.change_dice
-                )
-                self.phase_buttons.append(dice_button)
-                
-                # 使用道具按钮
-                item_button = Button(
-                    WINDOW_WIDTH // 2 - 60, WINDOW_HEIGHT - 200, 120, 40,
-                    "使用道具", self.use_item
-                )
-                self.phase_buttons.append(item_button)
-                
-                # 跳过按钮
-                skip_button = Button(
-                    WINDOW_WIDTH // 2 + 80, WINDOW_HEIGHT - 200, 120, 40,
-                    "跳过", self.skip_preparation, COLORS["warning"]
-                )
-                self.phase_buttons.append(skip_button)
+            if not phase_buttons_match(self, _PREP_SIG):
+                create_phase_buttons(self, prep_button_specs, _PREP_SIG)
         else:
             # 单人游戏模式使用原方法
             return original_show_preparation_choices(self)
@@ -194,29 +200,16 @@ def apply_final_ui_fix():
     def stable_show_action_choices(self):
         """稳定版的show_action_choices"""
         # 在多人游戏模式下，减少不必要的清理
-        if hasattr(self, 'is_multiplayer') and self.is_multiplayer:
+        if self.is_multiplayer:
             # 只有在按钮内容真正需要改变时才清理
-            current_button_texts = [getattr(btn, 'text', '') for btn in self.phase_buttons]
-            expected_texts = ["投骰子"]
-            
-            if current_button_texts != expected_texts:
-                self.phase_buttons.clear()
-                
-                # 重新创建按钮
-                from src.ui.components import Button
-                from src.ui.constants import COLORS, WINDOW_WIDTH, WINDOW_HEIGHT
-                
-                # 投骰子按钮
-                roll_button = Button(
-                    WINDOW_WIDTH // 2 - 60, WINDOW_HEIGHT - 200, 120, 40,
-                    "投骰子", self.roll_dice, COLORS["primary"]
-                )
-                self.phase_buttons.append(roll_button)
+            if not phase_buttons_match(self, _ACTION_SIG):
+                create_phase_buttons(self, action_button_specs, _ACTION_SIG)
         else:
             # 单人游戏模式使用原方法
             return original_show_action_choices(self)
     
-    # 应用所有修复
+    # 应用所有修复（is_multiplayer类默认值保证补丁里可以直接读取）
+    MainWindow.is_multiplayer = False
     MainWindow.init_multiplayer_game = fixed_init_multiplayer_game
     MainWindow.draw = optimized_draw
     MainWindow.handle_events = safe_handle_events
@@ -267,25 +260,45 @@ def test_final_fix():
         # 运行短时间以测试稳定性
         print("🎮 测试UI稳定性...")
         clock = pygame.time.Clock()
-        test_frames = 120  # 2秒测试
+        main_window._dirty = True
+        last_ui_state = None
+        
+        # 由定时器事件结束测试和触发状态检查（USEREVENT+1已被延迟移动使用）
+        stop_event = pygame.USEREVENT + 3
+        status_event = pygame.USEREVENT + 4
+        start_ticks = pygame.time.get_ticks()
+        pygame.time.set_timer(stop_event, 2000, loops=1)  # 2秒测试
+        pygame.time.set_timer(status_event, 500)  # 每0.5秒检查一次状态
+        running = True
         
-        for frame in range(test_frames):
-            # 处理基本事件
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    break
+        while running:
+            # 处理基本事件（每帧只取一次，之后交给handle_events）
+            events = pygame_event_get()
+            for event in events:
+                if event.type in (pygame.QUIT, stop_event):
+                    running = False
+                elif event.type == status_event:
+                    print(f"  📊 {pygame.time.get_ticks() - start_ticks}ms: 场景={main_window.current_scene}, 按钮={len(main_window.buttons)}, 阶段按钮={len(main_window.phase_buttons)}")
+            if not running:
+                break
             
             # 测试游戏循环
+            feed_events(events)
             main_window.handle_events()
             main_window.update()
-            main_window.draw()
             
-            # 每30帧检查一次状态
-            if frame % 30 == 0:
-                print(f"  📊 帧{frame}: 场景={main_window.current_scene}, 按钮={len(main_window.buttons)}, 阶段按钮={len(main_window.phase_buttons)}")
+            # 只有界面状态变化或有输入事件时才重绘
+            ui_state = (main_window.current_scene, len(main_window.buttons), len(main_window.phase_buttons))
+            if events or ui_state != last_ui_state:
+                main_window._dirty = True
+                last_ui_state = ui_state
+            if main_window._dirty:
+                main_window.draw()
+                main_window._dirty = False
             
             clock.tick(60)
         
+        pygame.time.set_timer(status_event, 0)
         pygame.quit()
         print("🎉 最终修复测试完成！UI应该不再闪烁")
         
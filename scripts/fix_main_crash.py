@@ -4,28 +4,27 @@
 这个脚本会直接修改 main_window.py 文件，应用所有必要的修复
 """
 
+import ast
+import hashlib
+import json
 import os
 import re
+import sys
+import textwrap
+from collections import namedtuple
 
-def fix_main_window():
-    """修复 main_window.py 文件"""
-    file_path = "src/ui/main_window.py"
-    
-    if not os.path.exists(file_path):
-        print(f"❌ 文件不存在: {file_path}")
-        return False
-    
-    print(f"🔧 开始修复文件: {file_path}")
-    
-    # 读取文件内容
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # 1. 修复 close_bank 方法
-    if "只有在结算阶段才推进到下一阶段" not in content:
-        content = content.replace(
-            '    def close_bank(self):\n        """关闭银行"""\n        if self.bank_window:\n            self.bank_window.hide()\n        # 继续游戏流程\n        self.advance_phase()',
-            '''    def close_bank(self):
+# 需要修改的 MainWindow 方法
+_TARGET_METHODS = ("close_bank", "start_settlement_phase", "execute_settlement", "update")
+
+# 源码按 UTF-8 字节处理，所有字面量在导入时编码一次
+_CLOSE_BANK_OLD = '''    def close_bank(self):
+        """关闭银行"""
+        if self.bank_window:
+            self.bank_window.hide()
+        # 继续游戏流程
+        self.advance_phase()'''.encode('utf-8')
+
+_CLOSE_BANK_NEW = '''    def close_bank(self):
         """关闭银行"""
         if self.bank_window:
             self.bank_window.hide()
@@ -37,15 +36,13 @@ def fix_main_window():
                 print(f"🔧 关闭银行时推进阶段失败: {e}")
                 # 设置自动推进作为备用方案
                 self.phase_auto_advance = True
-                self.phase_timer = 500  # 0.5秒后自动推进'''
-        )
-        print("✅ 修复了 close_bank 方法")
-    
-    # 2. 在 start_settlement_phase 方法中添加窗口检查
-    # 查找 start_settlement_phase 方法
-    settlement_pattern = r'(def start_settlement_phase\(self\):\s*"""开始结算阶段"""\s*current_player = self\.game_state\.get_current_player\(\)\s*self\.add_message\(f"{current_player\.name}的结算阶段", "info"\)\s*# 自动执行结算逻辑\s*self\.execute_settlement\(\)\s*)# 设置延迟自动推进到结束阶段，而不是立即推进\s*self\.phase_auto_advance = True\s*self\.phase_timer = 1500  # 1\.5秒延迟'
-    
-    settlement_replacement = r'''\1# 检查是否有UI窗口打开，如果有则不自动推进
+                self.phase_timer = 500  # 0.5秒后自动推进'''.encode('utf-8')
+
+_SETTLEMENT_TAIL_OLD = '''# 设置延迟自动推进到结束阶段，而不是立即推进
+        self.phase_auto_advance = True
+        self.phase_timer = 1500  # 1.5秒延迟'''.encode('utf-8')
+
+_SETTLEMENT_TAIL_NEW = '''# 检查是否有UI窗口打开，如果有则不自动推进
         has_open_window = False
         
         # 检查各种可能的窗口
@@ -72,116 +69,227 @@ def fix_main_window():
             # 有窗口打开，不自动推进，等待窗口关闭
             self.phase_auto_advance = False
             self.phase_timer = 0
-            print("🔧 因窗口打开而暂停自动推进")'''
+            print("🔧 因窗口打开而暂停自动推进")'''.encode('utf-8')
+
+# except 块模板（相对 try 的缩进，插入时再按方法体缩进）
+# 模板使用模块级导入的 report_exception，插入时由 ensure_module_imports 补齐导入
+_SETTLEMENT_HANDLER = '''except Exception as e:
+    print(f"❌ execute_settlement 异常: {e}")
+    # 同一位置的同类异常每秒最多打印一次堆栈，避免每帧重复格式化
+    report_exception(e)
     
-    if "检查是否有UI窗口打开" not in content:
-        content = re.sub(settlement_pattern, settlement_replacement, content, flags=re.MULTILINE | re.DOTALL)
+    # 发生错误时添加提示消息
+    try:
+        current_player = self.game_state.get_current_player()
+        if current_player:
+            self.add_message(f"{current_player.name}结算时发生错误: {e}", "error")
+        else:
+            self.add_message(f"结算时发生错误: {e}", "error")
+    except:
+        pass
+'''
+
+_UPDATE_HANDLER = '''except Exception as e:
+    print(f"🔧 update 异常: {e}")
+    # 同一位置的同类异常每秒最多打印一次堆栈，避免每帧重复格式化
+    report_exception(e)
+    # 不让异常传播，保持游戏运行
+    try:
+        self.add_message("游戏更新时出现错误", "error")
+        # 重置可能有问题的状态
+        self.phase_auto_advance = False
+        self.phase_timer = 0
+    except:
+        pass
+'''
+
+# 方法位置缓存：源码摘要不变时跳过 ast.parse
+_CACHE_PATH = os.path.join(".cache", "main_window_methods.json")
+
+# 方法位置信息：行范围、文档字符串后的起始行与缩进、方法体是否已整体包在 try 中
+_MethodSpan = namedtuple("_MethodSpan", "lineno end_lineno body_line body_col wrapped")
+
+# 注入的 except 块依赖的模块级导入语句
+_HANDLER_IMPORTS = (b"from src.ui.exc_report import report_exception",)
+
+def ensure_module_imports(content):
+    """确保源码在模块级包含注入的 except 块所需的导入语句，缺少时插在第一条 import 之后"""
+    missing = [line for line in _HANDLER_IMPORTS
+               if not re.search(rb"^" + re.escape(line) + rb"[ \t\r]*$", content, re.M)]
+    if not missing:
+        return content
+    first = re.search(rb"^import [^\n]*\n", content, re.M)
+    offset = first.end() if first else 0
+    imports = b"".join(line + b"\n" for line in missing)
+    return content[:offset] + imports + content[offset:]
+
+def _parse_methods(content):
+    """解析源码，返回 MainWindow 中目标方法的 {方法名: _MethodSpan}"""
+    tree = ast.parse(content)
+    methods = {}
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef) and node.name == "MainWindow":
+            for item in node.body:
+                if isinstance(item, ast.FunctionDef) and item.name in _TARGET_METHODS:
+                    methods[item.name] = _method_span(item)
+    return methods
+
+def _method_span(node):
+    """从 FunctionDef 提取打补丁需要的位置信息"""
+    first = node.body[0]
+    index = 0
+    if (isinstance(first, ast.Expr) and isinstance(first.value, ast.Constant)
+            and isinstance(first.value.value, str)):
+        index = 1
+    body = node.body[index:]
+    # 从文档字符串的下一行开始，保留中间的注释
+    body_line = node.body[index - 1].end_lineno + 1 if index else node.lineno + 1
+    return _MethodSpan(
+        node.lineno,
+        node.end_lineno,
+        body_line,
+        body[0].col_offset if body else None,
+        len(body) == 1 and isinstance(body[0], ast.Try),
+    )
+
+def _find_methods(content):
+    """返回目标方法位置，源码摘要命中缓存时不再重新解析"""
+    digest = hashlib.blake2b(content, digest_size=16).hexdigest()
+    try:
+        with open(_CACHE_PATH, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached["digest"] == digest:
+            return {name: _MethodSpan(*span) for name, span in cached["methods"].items()}
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
     
-    # 3. 在 execute_settlement 方法开头添加异常处理
-    execute_settlement_pattern = r'(def execute_settlement\(self\):\s*"""执行结算""")'
-    execute_settlement_replacement = r'''\1
-        try:'''
+    methods = _parse_methods(content)
+    try:
+        os.makedirs(os.path.dirname(_CACHE_PATH), exist_ok=True)
+        with open(_CACHE_PATH, 'w', encoding='utf-8') as f:
+            json.dump({"digest": digest, "methods": methods}, f)
+    except OSError:
+        pass
+    return methods
+
+def _line_offsets(content):
+    """返回每行起始偏移，末尾附加源码长度，offsets[n] 即第 n 行（从 1 开始）的结束位置"""
+    offsets = [0]
+    offsets.extend(m.end() for m in re.finditer(b"\n", content))
+    if offsets[-1] != len(content):
+        offsets.append(len(content))
+    return offsets
+
+def _replace_in_method(content, offsets, span, old, new):
+    """在方法的字节范围内做字面量替换，返回 (起始偏移, 结束偏移, 新字节) 或 None
+
+    修复后的方法中不再包含旧文本，因此不需要额外的全文件"已修复"检查
+    """
+    start, end = offsets[span.lineno - 1], offsets[span.end_lineno]
+    segment = content[start:end]
+    if old not in segment:
+        return None
+    return (start, end, segment.replace(old, new, 1))
+
+def _wrap_in_try(content, offsets, span, handler):
+    """把方法体（文档字符串之后）包进 try 并追加 except 块，已包裹则返回 None"""
+    if span.body_col is None or span.wrapped:
+        return None
     
-    if "def execute_settlement(self):" in content and "try:" not in content.split("def execute_settlement(self):")[1].split("def ")[0]:
-        content = re.sub(execute_settlement_pattern, execute_settlement_replacement, content)
-        
-        # 在方法末尾添加异常处理
-        # 找到方法结束的位置（下一个方法开始）
-        lines = content.split('\n')
-        in_execute_settlement = False
-        indent_level = None
-        insert_position = -1
-        
-        for i, line in enumerate(lines):
-            if 'def execute_settlement(self):' in line:
-                in_execute_settlement = True
-                indent_level = len(line) - len(line.lstrip())
-                continue
-            
-            if in_execute_settlement:
-                # 检查是否到了下一个方法
-                if line.strip() and not line.startswith(' ') and not line.startswith('\t'):
-                    # 找到了下一个顶级定义
-                    insert_position = i
-                    break
-                elif line.strip().startswith('def ') and len(line) - len(line.lstrip()) <= indent_level:
-                    # 找到了同级或更高级的方法定义
-                    insert_position = i
-                    break
-        
-        if insert_position > 0:
-            exception_handler = '''        except Exception as e:
-            print(f"❌ execute_settlement 异常: {e}")
-            import traceback
-            traceback.print_exc()
-            
-            # 发生错误时添加提示消息
-            try:
-                current_player = self.game_state.get_current_player()
-                if current_player:
-                    self.add_message(f"{current_player.name}结算时发生错误: {e}", "error")
-                else:
-                    self.add_message(f"结算时发生错误: {e}", "error")
-            except:
-                pass
-'''
-            lines.insert(insert_position, exception_handler)
-            content = '\n'.join(lines)
+    start, end = offsets[span.body_line - 1], offsets[span.end_lineno]
+    indent = " " * span.body_col
+    wrapped = [indent.encode() + b"try:\n"]
+    wrapped.extend(b"    " + line if line.strip() else line
+                   for line in content[start:end].splitlines(keepends=True))
+    if not wrapped[-1].endswith(b"\n"):
+        wrapped[-1] += b"\n"
+    wrapped.append(textwrap.indent(handler, indent).encode('utf-8'))
+    return (start, end, b"".join(wrapped))
+
+def patch_main_window(content):
+    """对源码字节应用崩溃修复，返回修复后的字节；源码无法解析时抛出 SyntaxError"""
+    methods = _find_methods(content)
+    offsets = _line_offsets(content)
+    edits = []
+    
+    # 1. 修复 close_bank 方法
+    if "close_bank" in methods:
+        edit = _replace_in_method(content, offsets, methods["close_bank"], _CLOSE_BANK_OLD, _CLOSE_BANK_NEW)
+        if edit:
+            edits.append(edit)
+            print("✅ 修复了 close_bank 方法")
+    
+    # 2. 在 start_settlement_phase 方法中添加窗口检查
+    if "start_settlement_phase" in methods:
+        edit = _replace_in_method(content, offsets, methods["start_settlement_phase"],
+                                  _SETTLEMENT_TAIL_OLD, _SETTLEMENT_TAIL_NEW)
+        if edit:
+            edits.append(edit)
+            print("✅ 为 start_settlement_phase 添加了窗口检查")
+    
+    # 3. 为 execute_settlement 方法添加异常处理
+    if "execute_settlement" in methods:
+        edit = _wrap_in_try(content, offsets, methods["execute_settlement"], _SETTLEMENT_HANDLER)
+        if edit:
+            edits.append(edit)
+            print("✅ 为 execute_settlement 添加了异常处理")
     
     # 4. 在 update 方法中添加紧急恢复机制
-    update_pattern = r'(def update\(self\):\s*"""更新游戏状态"""\s*)# 更新动画系统'
-    update_replacement = r'''\1try:
-            # 更新动画系统'''
+    if "update" in methods:
+        edit = _wrap_in_try(content, offsets, methods["update"], _UPDATE_HANDLER)
+        if edit:
+            edits.append(edit)
+            print("✅ 为 update 添加了异常处理")
     
-    if "def update(self):" in content and "try:" not in content.split("def update(self):")[1].split("def ")[0].split("# 更新动画系统")[0]:
-        content = re.sub(update_pattern, update_replacement, content)
-        
-        # 在 update 方法末尾添加异常处理
-        lines = content.split('\n')
-        in_update = False
-        indent_level = None
-        insert_position = -1
-        
-        for i, line in enumerate(lines):
-            if 'def update(self):' in line:
-                in_update = True
-                indent_level = len(line) - len(line.lstrip())
-                continue
-            
-            if in_update:
-                if line.strip() and not line.startswith(' ') and not line.startswith('\t'):
-                    insert_position = i
-                    break
-                elif line.strip().startswith('def ') and len(line) - len(line.lstrip()) <= indent_level:
-                    insert_position = i
-                    break
-        
-        if insert_position > 0:
-            exception_handler = '''        except Exception as e:
-            print(f"🔧 update 异常: {e}")
-            import traceback
-            traceback.print_exc()
-            # 不让异常传播，保持游戏运行
-            try:
-                self.add_message("游戏更新时出现错误", "error")
-                # 重置可能有问题的状态
-                self.phase_auto_advance = False
-                self.phase_timer = 0
-            except:
-                pass
-'''
-            lines.insert(insert_position, exception_handler)
-            content = '\n'.join(lines)
+    if not edits:
+        return content
+    
+    # 按偏移顺序切片拼接，整个文件只 join 一次
+    pieces = []
+    position = 0
+    for start, end, text in sorted(edits):
+        pieces.append(content[position:start])
+        pieces.append(text)
+        position = end
+    pieces.append(content[position:])
+    return ensure_module_imports(b"".join(pieces))
+
+def fix_main_window():
+    """修复 main_window.py 文件"""
+    file_path = "src/ui/main_window.py"
+    
+    if not os.path.exists(file_path):
+        print(f"❌ 文件不存在: {file_path}")
+        return False
+    
+    print(f"🔧 开始修复文件: {file_path}")
+    
+    # 读取文件内容
+    with open(file_path, 'rb') as f:
+        content = f.read()
+    
+    try:
+        fixed = patch_main_window(content)
+    except SyntaxError as e:
+        print(f"❌ 无法解析 {file_path}: {e}")
+        return False
+    
+    # 没有任何修改时不写回，保持文件内容和修改时间不变
+    if fixed == content:
+        print(f"ℹ️ 无需修复: {file_path}")
+        return True
     
     # 写回文件
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(content)
+    with open(file_path, 'wb') as f:
+        f.write(fixed)
     
     print(f"✅ 修复完成: {file_path}")
     return True
 
 def main():
     """主函数"""
+    # 关闭行缓冲，所有输出在退出时一次写出
+    sys.stdout.reconfigure(line_buffering=False)
     print("🔧 开始修复游戏崩溃问题...")
     
     if fix_main_window():
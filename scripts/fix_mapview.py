@@ -1,24 +1,37 @@
 #!/usr/bin/env python3
 """修复MapView参数问题"""
 
+import sys
+
+def fix_mapview(content):
+    """对源码字节应用 MapView 修复，返回修复后的字节"""
+    # 修复screen_to_map_pos调用
+    # mouse_pos是一个元组(x, y)，需要解包传给两个参数
+    return content.replace(
+        b"map_pos = self.map_view.screen_to_map_pos(mouse_pos)",
+        b"map_pos = self.map_view.screen_to_map_pos(mouse_pos[0], mouse_pos[1])"
+    )
+
 def main():
+    # 关闭行缓冲，所有输出在退出时一次写出
+    sys.stdout.reconfigure(line_buffering=False)
+    
     print("🔧 修复MapView参数问题...")
     
     # 读取文件
-    with open('src/ui/main_window.py', 'r', encoding='utf-8') as f:
+    with open('src/ui/main_window.py', 'rb') as f:
         content = f.read()
     
-    # 修复screen_to_map_pos调用
-    content = content.replace(
-        "map_pos = self.map_view.screen_to_map_pos(mouse_pos)",
-        "map_pos = self.map_view.screen_to_map_pos(mouse_pos[0], mouse_pos[1])"
-    )
+    fixed = fix_mapview(content)
+    if fixed == content:
+        print("ℹ️ 没有发现需要修复的问题")
+        return
     
     print("✅ 修复了screen_to_map_pos参数问题")
     
     # 写回文件
-    with open('src/ui/main_window.py', 'w', encoding='utf-8') as f:
-        f.write(content)
+    with open('src/ui/main_window.py', 'wb') as f:
+        f.write(fixed)
     
     print("✅ MapView问题修复完成！")
 
@@ -7,6 +7,141 @@
 
 import re
 import os
+import sys
+import textwrap
+from bisect import bisect_right
+
+from fix_main_crash import ensure_module_imports
+
+# 字面量修复表：原文 -> 替换文本（全部按 UTF-8 字节处理，省去解码/编码）
+_SHOP_FIXES = {
+    # 商店格子类型匹配
+    b'elif current_cell.cell_type == "item_shop":':
+        b'elif current_cell.cell_type == "shop":',
+    # 骰子商店窗口检查
+    b'if not handled and self.dice_shop_window and self.dice_shop_window.is_open:':
+        b'if not handled and self.dice_shop_window and getattr(self.dice_shop_window, "visible", False):',
+    # 道具商店窗口检查
+    b'if not handled and self.item_shop_window and self.item_shop_window.is_open:':
+        b'if not handled and self.item_shop_window and getattr(self.item_shop_window, "visible", False):',
+    # 骰子商店ESC关闭检查
+    b'elif self.dice_shop_window and self.dice_shop_window.is_open:':
+        b'elif self.dice_shop_window and getattr(self.dice_shop_window, "visible", False):',
+    # 道具商店ESC关闭检查
+    b'elif self.item_shop_window and self.item_shop_window.is_open:':
+        b'elif self.item_shop_window and getattr(self.item_shop_window, "visible", False):',
+    # 绘制检查
+    b'if self.dice_shop_window and self.dice_shop_window.is_open:':
+        b'if self.dice_shop_window and getattr(self.dice_shop_window, "visible", False):',
+    b'if self.item_shop_window and self.item_shop_window.is_open:':
+        b'if self.item_shop_window and getattr(self.item_shop_window, "visible", False):',
+}
+
+# 长的键优先，保证 "elif ..." / "if not handled ..." 先于其子串匹配
+_SHOP_FIXES_RE = re.compile(
+    b'|'.join(re.escape(k) for k in sorted(_SHOP_FIXES, key=len, reverse=True))
+)
+
+# 商店绘制修复：(预编译模式, 替换字节)，导入时编译、编码一次
+_DRAW_PATTERNS = [
+    # 修复骰子商店绘制
+    (re.compile(rb'if self\.dice_shop_window and getattr\(self\.dice_shop_window, "visible", False\):\s*self\.dice_shop_window\.draw\(\)'),
+     '''if self.dice_shop_window and getattr(self.dice_shop_window, "visible", False):
+            try:
+                self.dice_shop_window.draw(self.screen)
+            except Exception as e:
+                print(f"🔧 骰子商店绘制错误: {e}")'''.encode('utf-8')),
+    # 修复道具商店绘制
+    (re.compile(rb'if self\.item_shop_window and getattr\(self\.item_shop_window, "visible", False\):\s*self\.item_shop_window\.draw\(\)'),
+     '''if self.item_shop_window and getattr(self.item_shop_window, "visible", False):
+            try:
+                self.item_shop_window.draw(self.screen)
+            except Exception as e:
+                print(f"🔧 道具商店绘制错误: {e}")'''.encode('utf-8')),
+]
+
+_ITEM_USE_DEF = b"def execute_item_use(self, item_id: int, target_info: dict):"
+
+# except 块模板（相对 try 的缩进，插入时再按方法体缩进）
+_ITEM_USE_HANDLER = '''except Exception as e:
+    print(f"🔧 道具使用错误: {e}")
+    # 同一位置的同类异常每秒最多打印一次堆栈，避免每帧重复格式化
+    report_exception(e)
+    try:
+        self.add_message("道具使用失败", "error")
+        self.close_inventory_window()
+    except:
+        pass
+'''
+
+def _wrap_item_use(content):
+    """把 execute_item_use 的方法体包进 try/except，找不到或已包裹时原样返回"""
+    offset = content.find(_ITEM_USE_DEF)
+    if offset < 0:
+        return content
+    
+    # 每行起始偏移只构建一次，用二分查找定位 def 所在行
+    line_starts = [0]
+    line_starts.extend(m.end() for m in re.finditer(b'\n', content))
+    line_count = len(line_starts)
+    def_line = bisect_right(line_starts, offset) - 1
+    indent = offset - line_starts[def_line]
+    
+    # 向后找到第一行缩进不大于 def 的非空行，即方法结束处
+    body_start = line_starts[def_line + 1] if def_line + 1 < line_count else len(content)
+    body_end = body_start
+    for i in range(def_line + 1, line_count):
+        start = line_starts[i]
+        stop = line_starts[i + 1] if i + 1 < line_count else len(content)
+        line = content[start:stop]
+        stripped = line.lstrip()
+        if not stripped:
+            continue
+        if len(line) - len(stripped) <= indent:
+            break
+        body_end = stop
+    
+    body = content[body_start:body_end].splitlines(keepends=True)
+    if not body:
+        return content
+    
+    body_indent = b" " * (indent + 4)
+    head = []
+    stripped = body[0].strip()
+    if len(stripped) >= 6 and stripped.startswith(b'"""') and stripped.endswith(b'"""'):
+        # 文档字符串后添加try
+        head.append(body.pop(0))
+    if body and body[0].strip() == b"try:":
+        return content
+    
+    wrapped = head + [body_indent + b"try:\n"]
+    # 缩进所有内容
+    wrapped.extend(b"    " + line if line.strip() else line for line in body)
+    if not wrapped[-1].endswith(b"\n"):
+        wrapped[-1] += b"\n"
+    wrapped.append(textwrap.indent(_ITEM_USE_HANDLER, " " * (indent + 4)).encode('utf-8'))
+    return ensure_module_imports(content[:body_start] + b"".join(wrapped) + content[body_end:])
+
+def apply_shop_fixes(content):
+    """对源码字节应用商店修复，返回修复后的字节"""
+    # 1. 修复商店格子类型匹配（item_shop -> shop）
+    # 2. 修复商店窗口属性检查（is_open -> visible）
+    print("🔧 修复商店格子类型匹配和窗口属性检查...")
+    content = _SHOP_FIXES_RE.sub(lambda m: _SHOP_FIXES[m.group(0)], content)
+    
+    # 3. 为商店窗口添加安全的 draw 方法调用
+    print("🔧 添加安全的绘制方法...")
+    
+    for pattern, replacement in _DRAW_PATTERNS:
+        content = pattern.sub(replacement, content)
+    
+    # 4. 为使用道具添加安全处理
+    print("🔧 为使用道具添加安全处理...")
+    
+    # 找到 execute_item_use 方法并添加安全包装
+    content = _wrap_item_use(content)
+    
+    return content
 
 def fix_shop_issues():
     """修复商店相关问题"""
@@ -20,136 +155,16 @@ def fix_shop_issues():
     
     try:
         # 读取文件
-        with open(main_window_path, 'r', encoding='utf-8') as f:
+        with open(main_window_path, 'rb') as f:
             content = f.read()
         
         original_content = content
-        
-        # 1. 修复商店格子类型匹配（item_shop -> shop）
-        print("🔧 修复商店格子类型匹配...")
-        content = content.replace(
-            'elif current_cell.cell_type == "item_shop":',
-            'elif current_cell.cell_type == "shop":'
-        )
-        
-        # 2. 修复商店窗口属性检查（is_open -> visible）
-        print("🔧 修复商店窗口属性检查...")
-        
-        # 修复骰子商店窗口检查
-        content = content.replace(
-            'if not handled and self.dice_shop_window and self.dice_shop_window.is_open:',
-            'if not handled and self.dice_shop_window and getattr(self.dice_shop_window, "visible", False):'
-        )
-        
-        # 修复道具商店窗口检查
-        content = content.replace(
-            'if not handled and self.item_shop_window and self.item_shop_window.is_open:',
-            'if not handled and self.item_shop_window and getattr(self.item_shop_window, "visible", False):'
-        )
-        
-        # 修复骰子商店ESC关闭检查
-        content = content.replace(
-            'elif self.dice_shop_window and self.dice_shop_window.is_open:',
-            'elif self.dice_shop_window and getattr(self.dice_shop_window, "visible", False):'
-        )
-        
-        # 修复道具商店ESC关闭检查
-        content = content.replace(
-            'elif self.item_shop_window and self.item_shop_window.is_open:',
-            'elif self.item_shop_window and getattr(self.item_shop_window, "visible", False):'
-        )
-        
-        # 修复绘制检查
-        content = content.replace(
-            'if self.dice_shop_window and self.dice_shop_window.is_open:',
-            'if self.dice_shop_window and getattr(self.dice_shop_window, "visible", False):'
-        )
-        
-        content = content.replace(
-            'if self.item_shop_window and self.item_shop_window.is_open:',
-            'if self.item_shop_window and getattr(self.item_shop_window, "visible", False):'
-        )
-        
-        # 3. 为商店窗口添加安全的 draw 方法调用
-        print("🔧 添加安全的绘制方法...")
-        
-        # 修复骰子商店绘制
-        draw_dice_shop_pattern = r'if self\.dice_shop_window and getattr\(self\.dice_shop_window, "visible", False\):\s*self\.dice_shop_window\.draw\(\)'
-        draw_dice_shop_replacement = '''if self.dice_shop_window and getattr(self.dice_shop_window, "visible", False):
-            try:
-                self.dice_shop_window.draw(self.screen)
-            except Exception as e:
-                print(f"🔧 骰子商店绘制错误: {e}")'''
-        
-        content = re.sub(draw_dice_shop_pattern, draw_dice_shop_replacement, content)
-        
-        # 修复道具商店绘制
-        draw_item_shop_pattern = r'if self\.item_shop_window and getattr\(self\.item_shop_window, "visible", False\):\s*self\.item_shop_window\.draw\(\)'
-        draw_item_shop_replacement = '''if self.item_shop_window and getattr(self.item_shop_window, "visible", False):
-            try:
-                self.item_shop_window.draw(self.screen)
-            except Exception as e:
-                print(f"🔧 道具商店绘制错误: {e}")'''
-        
-        content = re.sub(draw_item_shop_pattern, draw_item_shop_replacement, content)
-        
-        # 4. 为使用道具添加安全处理
-        print("🔧 为使用道具添加安全处理...")
-        
-        # 找到 execute_item_use 方法并添加安全包装
-        execute_item_pattern = r'(def execute_item_use\(self, item_id: int, target_info: dict\):)'
-        execute_item_replacement = r'''\1
-        """执行道具使用"""
-        try:'''
-        
-        if "def execute_item_use(self, item_id: int, target_info: dict):" in content:
-            # 添加异常处理
-            lines = content.split('\n')
-            new_lines = []
-            in_execute_item = False
-            indent_level = 0
-            
-            for line in lines:
-                if 'def execute_item_use(self, item_id: int, target_info: dict):' in line:
-                    in_execute_item = True
-                    indent_level = len(line) - len(line.lstrip())
-                    new_lines.append(line)
-                    continue
-                    
-                if in_execute_item:
-                    if line.strip() and not line.startswith(' ' * (indent_level + 1)) and 'def ' in line:
-                        # 到了下一个方法，结束
-                        # 在前面添加异常处理结束
-                        new_lines.append(' ' * (indent_level + 4) + 'except Exception as e:')
-                        new_lines.append(' ' * (indent_level + 8) + 'print(f"🔧 道具使用错误: {e}")')
-                        new_lines.append(' ' * (indent_level + 8) + 'import traceback')
-                        new_lines.append(' ' * (indent_level + 8) + 'traceback.print_exc()')
-                        new_lines.append(' ' * (indent_level + 8) + 'try:')
-                        new_lines.append(' ' * (indent_level + 12) + 'self.add_message("道具使用失败", "error")')
-                        new_lines.append(' ' * (indent_level + 12) + 'self.close_inventory_window()')
-                        new_lines.append(' ' * (indent_level + 8) + 'except:')
-                        new_lines.append(' ' * (indent_level + 12) + 'pass')
-                        in_execute_item = False
-                        new_lines.append(line)
-                    elif line.strip().startswith('"""') and line.strip().endswith('"""'):
-                        # 文档字符串后添加try
-                        new_lines.append(line)
-                        new_lines.append(' ' * (indent_level + 4) + 'try:')
-                    else:
-                        # 缩进所有内容
-                        if line.strip():
-                            new_lines.append(' ' * 4 + line)
-                        else:
-                            new_lines.append(line)
-                else:
-                    new_lines.append(line)
-                    
-            content = '\n'.join(new_lines)
+        content = apply_shop_fixes(content)
         
         # 检查是否有修改
         if content != original_content:
             # 写入文件
-            with open(main_window_path, 'w', encoding='utf-8') as f:
+            with open(main_window_path, 'wb') as f:
                 f.write(content)
             print("✅ 商店问题修复完成！")
             print("🔧 修复内容:")
@@ -169,6 +184,8 @@ def fix_shop_issues():
         return False
 
 if __name__ == "__main__":
+    # 关闭行缓冲，所有输出在退出时一次写出
+    sys.stdout.reconfigure(line_buffering=False)
     print("🎯 商店问题修复工具")
     print("=" * 50)
     
@@ -1,44 +1,48 @@
 """简单修复商店问题"""
 import os
-
-# 读取文件
-with open("src/ui/main_window.py", 'r', encoding='utf-8') as f:
-    content = f.read()
-
-# 修复1: 商店格子类型
-content = content.replace(
-    'elif current_cell.cell_type == "item_shop":',
-    'elif current_cell.cell_type == "shop":'
-)
-
-# 修复2: 窗口属性检查
-content = content.replace(
-    'self.dice_shop_window.is_open',
-    'getattr(self.dice_shop_window, "visible", False)'
-)
-
-content = content.replace(
-    'self.item_shop_window.is_open',
-    'getattr(self.item_shop_window, "visible", False)'
+import re
+import sys
+
+_SHOP_FIXES = {
+    # 修复1: 商店格子类型
+    b'elif current_cell.cell_type == "item_shop":': b'elif current_cell.cell_type == "shop":',
+    # 修复2: 窗口属性检查
+    b'self.dice_shop_window.is_open': b'getattr(self.dice_shop_window, "visible", False)',
+    b'self.item_shop_window.is_open': b'getattr(self.item_shop_window, "visible", False)',
+    # 修复3: 绘制方法调用
+    b'self.dice_shop_window.draw()': b'self.dice_shop_window.draw(self.screen)',
+    b'self.item_shop_window.draw()': b'self.item_shop_window.draw(self.screen)',
+}
+_SHOP_FIXES_RE = re.compile(
+    b'|'.join(re.escape(k) for k in sorted(_SHOP_FIXES, key=len, reverse=True))
 )
 
-# 修复3: 绘制方法调用
-content = content.replace(
-    'self.dice_shop_window.draw()',
-    'self.dice_shop_window.draw(self.screen)'
-)
-
-content = content.replace(
-    'self.item_shop_window.draw()',
-    'self.item_shop_window.draw(self.screen)'
-)
-
-# 写入文件
-with open("src/ui/main_window.py", 'w', encoding='utf-8') as f:
-    f.write(content)
-
-print("✅ 商店修复完成！")
-print("修复内容:")
-print("1. 商店格子类型: item_shop -> shop") 
-print("2. 窗口属性: is_open -> visible")
-print("3. 绘制方法: 添加screen参数") 
\ No newline at end of file
+def fix_shop(content):
+    """对源码字节应用商店修复，一次扫描完成全部替换"""
+    return _SHOP_FIXES_RE.sub(lambda m: _SHOP_FIXES[m.group(0)], content)
+
+def main():
+    # 关闭行缓冲，所有输出在退出时一次写出
+    sys.stdout.reconfigure(line_buffering=False)
+    
+    # 读取文件
+    with open("src/ui/main_window.py", 'rb') as f:
+        content = f.read()
+    
+    fixed = fix_shop(content)
+    if fixed == content:
+        print("ℹ️ 没有发现需要修复的问题")
+        return
+    
+    # 写入文件
+    with open("src/ui/main_window.py", 'wb') as f:
+        f.write(fixed)
+    
+    print("✅ 商店修复完成！")
+    print("修复内容:")
+    print("1. 商店格子类型: item_shop -> shop") 
+    print("2. 窗口属性: is_open -> visible")
+    print("3. 绘制方法: 添加screen参数")
+
+if __name__ == "__main__":
+    main()
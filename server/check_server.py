@@ -2,17 +2,32 @@
 """
 检查房间服务器状态
 """
+import errno
+import select
 import socket
 import sys
 
-def check_server(host="localhost", port=8766):
+# 非阻塞 connect 进行中时返回的错误码（Windows 上为 WSAEWOULDBLOCK）
+_CONNECT_PENDING = {errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EAGAIN,
+                    getattr(errno, "WSAEWOULDBLOCK", errno.EWOULDBLOCK)}
+
+def check_server(host="localhost", port=8766, timeout=0.1):
     """检查服务器是否在运行"""
     try:
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(3)
-        result = sock.connect_ex((host, port))
-        sock.close()
-        return result == 0
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            # 非阻塞连接：端口未监听时收到RST立即返回，不必等待超时
+            sock.setblocking(False)
+            result = sock.connect_ex((host, port))
+            if result == 0:
+                return True
+            if result not in _CONNECT_PENDING:
+                return False
+            
+            _, writable, failed = select.select([], [sock], [sock], timeout)
+            if failed or not writable:
+                return False
+            # 连接被拒绝时socket同样可写，需要检查SO_ERROR
+            return sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) == 0
     except Exception as e:
         print(f"检查服务器时出错: {e}")
         return False
@@ -6,10 +6,24 @@
 
 import asyncio
 import json
+import os
 import sys
 import traceback
 import time
 
+# 将项目根目录加入Python路径以导入 src 下的共享模块（已在路径中则跳过）
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.network.wire import encode_message, decode_message
+
+try:
+    import websockets
+    WEBSOCKETS_AVAILABLE = True
+except ImportError:
+    WEBSOCKETS_AVAILABLE = False
+
 def safe_input(prompt="按 Enter 键继续..."):
     """安全的输入函数，防止EOFError"""
     try:
@@ -22,54 +36,25 @@ def find_available_port(host="localhost", start_port=8765):
     """查找可用端口"""
     import socket
     
-    for port in range(start_port, start_port + 20):
-        try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+    # 复用同一个socket探测，bind失败后socket仍未绑定，可以继续尝试下一个端口
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        # 与 asyncio.create_server 的默认行为一致：Windows上SO_REUSEADDR允许抢占占用中的端口，不能设置
+        if os.name != "nt":
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        for port in range(start_port, start_port + 20):
+            try:
                 s.bind((host, port))
-                return port
-        except OSError:
-            print(f"端口 {port} 被占用，尝试下一个...")
+            except OSError:
+                continue
+            if port != start_port:
+                print(f"端口 {start_port}-{port - 1} 被占用，使用端口 {port}")
+            return port
     
     return None
 
 async def simple_server(host="localhost", port=8765):
     """简单的websocket服务器"""
-    try:
-        import websockets
-        print(f"✅ websockets版本: {websockets.__version__}")
-    except ImportError:
-        print("❌ 缺少websockets模块")
-        print("请运行: pip install websockets")
-        print("")
-        print("💡 提示：如果您使用的是虚拟环境，请确保：")
-        print("1. 激活虚拟环境: DaFuWeng\\Scripts\\activate")
-        print("2. 在虚拟环境中安装: pip install websockets")
-        print("3. 在虚拟环境中运行服务器")
-        print("")
-        print("🔍 当前Python环境信息：")
-        print(f"Python路径: {sys.executable}")
-        print(f"Python版本: {sys.version}")
-        
-        # 尝试自动安装websockets
-        print("\n🚀 尝试自动安装websockets...")
-        try:
-            import subprocess
-            result = subprocess.run([sys.executable, "-m", "pip", "install", "websockets"], 
-                                  capture_output=True, text=True, timeout=60)
-            if result.returncode == 0:
-                print("✅ websockets安装成功！正在重新启动服务器...")
-                # 重新导入websockets
-                import importlib
-                import websockets
-                print(f"✅ websockets版本: {websockets.__version__}")
-            else:
-                print(f"❌ 自动安装失败: {result.stderr}")
-                safe_input()
-                return
-        except Exception as e:
-            print(f"❌ 自动安装出错: {e}")
-            safe_input()
-            return
+    print(f"✅ websockets版本: {websockets.__version__}")
     
     # 查找可用端口
     available_port = find_available_port(host, port)
@@ -85,6 +70,12 @@ async def simple_server(host="localhost", port=8765):
         client_id = f"client_{id(websocket)}"
         print(f"👤 客户端连接: {client_id}")
         
+        # 消息循环中每条消息都会用到，绑定为局部变量省去属性/全局查找
+        send = websocket.send
+        loads = decode_message
+        dumps = encode_message
+        now = time.time
+        
         try:
             # 发送欢迎消息 - 使用正确的NetworkMessage格式
             welcome_message = {
@@ -93,14 +84,14 @@ async def simple_server(host="localhost", port=8765):
                     "message": "欢迎连接大富翁服务器！",
                     "client_id": client_id
                 },
-                "timestamp": time.time(),
+                "timestamp": now(),
                 "sender_id": "server"
             }
-            await websocket.send(json.dumps(welcome_message, ensure_ascii=False))
+            await send(dumps(welcome_message))
             
             async for message in websocket:
                 try:
-                    data = json.loads(message)
+                    data = loads(message)
                     print(f"📨 收到消息: {data}")
                     
                     # 简单回应 - 使用正确的NetworkMessage格式
@@ -110,21 +101,21 @@ async def simple_server(host="localhost", port=8765):
                             "message": "服务器收到消息",
                             "received": data
                         },
-                        "timestamp": time.time(),
+                        "timestamp": now(),
                         "sender_id": "server"
                     }
-                    await websocket.send(json.dumps(response, ensure_ascii=False))
+                    await send(dumps(response))
                     
-                except json.JSONDecodeError:
+                except json.JSONDecodeError:  # orjson.JSONDecodeError 是其子类
                     error_message = {
                         "message_type": "error",
                         "data": {
                             "error": "无效的JSON格式"
                         },
-                        "timestamp": time.time(),
+                        "timestamp": now(),
                         "sender_id": "server"
                     }
-                    await websocket.send(json.dumps(error_message, ensure_ascii=False))
+                    await send(dumps(error_message))
         
         except websockets.exceptions.ConnectionClosed:
             print(f"👋 客户端断开: {client_id}")
@@ -145,12 +136,32 @@ async def simple_server(host="localhost", port=8765):
         print(f"❌ 服务器错误: {e}")
         traceback.print_exc()
 
+def print_websockets_help():
+    """打印缺少websockets模块时的安装提示"""
+    print("❌ 缺少websockets模块")
+    print("请运行: pip install websockets")
+    print("")
+    print("💡 提示：如果您使用的是虚拟环境，请确保：")
+    print("1. 激活虚拟环境: DaFuWeng\\Scripts\\activate")
+    print("2. 在虚拟环境中安装: pip install websockets")
+    print("3. 在虚拟环境中运行服务器")
+    print("")
+    print("🔍 当前Python环境信息：")
+    print(f"Python路径: {sys.executable}")
+    print(f"Python版本: {sys.version}")
+
 def main():
     """主函数"""
     print("=" * 50)
     print("🎮 大富翁快速服务器 - 修复版")
     print("=" * 50)
     
+    # 启动事件循环前检查依赖，缺少时直接提示退出
+    if not WEBSOCKETS_AVAILABLE:
+        print_websockets_help()
+        safe_input("按 Enter 键关闭...")
+        return
+    
     try:
         asyncio.run(simple_server())
     except KeyboardInterrupt:
@@ -5,13 +5,102 @@
 """
 
 import asyncio
-import json
+import itertools
+import os
 import sys
 import traceback
 import time
-import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Set
 
+# 将项目根目录加入Python路径以导入 src 下的共享模块（已在路径中则跳过）
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.network.wire import (
+    encode_message, decode_message, deflate_extensions, OUT_QUEUE_SIZE,
+    MAX_MESSAGE_SIZE, MAX_QUEUE, RATE_LIMIT, RATE_WINDOW, LISTEN_BACKLOG,
+)
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+
+# 合并发送时单个 multi 帧的大致上限（字节）
+MULTI_FRAME_LIMIT = 64 * 1024
+
+# 超过该大小（字节）的入站消息放到线程池中解析，避免长时间占用事件循环
+LARGE_MESSAGE_SIZE = 4096
+
+# 服务器时钟刷新间隔（秒），同一间隔内发出的消息共用一个时间戳
+CLOCK_INTERVAL = 0.01
+
+# 清理已断开但未注销的客户端的间隔（秒）
+REAP_INTERVAL = 30
+
+
+class JsonCodec:
+    """JSON消息编码（默认），以文本帧发送"""
+    invalid_format_error = "无效的JSON格式"
+    encode = staticmethod(encode_message)
+    decode = staticmethod(decode_message)
+    
+    def head(self, message_type: str):
+        """消息信封开头，后面紧跟已序列化的 data"""
+        return '{"message_type":"%s","data":' % message_type
+    
+    def tail(self, now: float):
+        """消息信封结尾"""
+        return ',"timestamp":%r,"sender_id":"server"}' % now
+    
+    def array(self, items):
+        """由已序列化的元素拼出数组"""
+        return "[" + ",".join(items) + "]"
+    
+    def field(self, key: str, encoded_value):
+        """由已序列化的值拼出只有一个键的对象"""
+        return '{"%s":' % key + encoded_value + "}"
+
+class MsgpackCodec:
+    """MessagePack消息编码（--binary），发送二进制帧；仍接受客户端发来的JSON文本帧"""
+    invalid_format_error = "无效的消息格式"
+    
+    @staticmethod
+    def encode(message):
+        return msgpack.packb(message, use_bin_type=True)
+    
+    @staticmethod
+    def decode(raw):
+        if isinstance(raw, str):
+            return decode_message(raw)
+        return msgpack.unpackb(raw, raw=False)
+    
+    def head(self, message_type: str):
+        """消息信封开头：固定4个字段的map，后面紧跟已序列化的 data"""
+        return b"\x84" + self.encode("message_type") + self.encode(message_type) + self.encode("data")
+    
+    def tail(self, now: float):
+        """消息信封结尾"""
+        return self.encode("timestamp") + self.encode(now) + self.encode("sender_id") + self.encode("server")
+    
+    def array(self, items):
+        """由已序列化的元素拼出数组"""
+        return msgpack.Packer().pack_array_header(len(items)) + b"".join(items)
+    
+    def field(self, key: str, encoded_value):
+        """由已序列化的值拼出只有一个键的map"""
+        return b"\x81" + self.encode(key) + encoded_value
+
 def safe_input(prompt="按 Enter 键继续..."):
     """安全的输入函数，防止EOFError"""
     try:
@@ -20,32 +109,98 @@ def safe_input(prompt="按 Enter 键继续..."):
         print("\n程序退出")
         return ""
 
-def find_available_port(host="localhost", start_port=8765):
-    """查找可用端口"""
+def bind_available_port(host="localhost", start_port=8765):
+    """绑定第一个可用端口，返回已绑定的socket，直接交给 websockets.serve(sock=...) 使用
+    
+    同时开启 TCP_NODELAY 与 SO_KEEPALIVE，接受的连接会继承这两个选项
+    """
     import socket
     
     for port in range(start_port, start_port + 20):
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.bind((host, port))
-                return port
+            # 与 asyncio.create_server 的默认行为一致：Windows上SO_REUSEADDR允许抢占占用中的端口，不能设置
+            if os.name != "nt":
+                s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            # 广播消息都很小，关闭Nagle算法降低延迟；保活探测及时发现失效的连接
+            s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            s.bind((host, port))
+            return s
         except OSError:
+            s.close()
             print(f"端口 {port} 被占用，尝试下一个...")
     
     return None
 
+class PlayerRec:
+    """房间内的玩家记录（__slots__ 避免每个玩家一个字典）"""
+    __slots__ = ("client_id", "name", "is_ready", "is_ai", "difficulty", "join_time")
+    
+    def __init__(self, client_id: str, name: str, is_ready: bool = False,
+                 is_ai: bool = False, difficulty: str = None):
+        self.client_id = client_id
+        self.name = name
+        self.is_ready = is_ready
+        self.is_ai = is_ai
+        self.difficulty = difficulty
+        self.join_time = time.time()
+    
+    def to_dict(self, is_host: bool = False) -> dict:
+        """转换为字典（仅在序列化时调用）；是否房主由房间的 host_id 决定，不单独保存"""
+        data = {
+            "client_id": self.client_id,
+            "name": self.name,
+            "is_ready": self.is_ready,
+            "is_host": is_host,
+            "is_ai": self.is_ai
+        }
+        if self.is_ai:
+            data["difficulty"] = self.difficulty
+        data["join_time"] = self.join_time
+        return data
+
+class ClientRec:
+    """已连接客户端的记录"""
+    __slots__ = ("client_id", "websocket", "player_name", "room_id", "connect_time", "out_queue", "writer",
+                 "recent_messages")
+    
+    def __init__(self, client_id: str, websocket, out_queue: asyncio.Queue, writer: asyncio.Task):
+        self.client_id = client_id
+        self.websocket = websocket
+        self.player_name = None
+        self.room_id = None
+        self.connect_time = time.time()
+        self.out_queue = out_queue
+        self.writer = writer
+        # 最近 RATE_LIMIT 条消息的到达时间，用于限流
+        self.recent_messages = deque(maxlen=RATE_LIMIT)
+
 class GameRoom:
     """游戏房间类"""
-    def __init__(self, room_id: str, name: str, max_players: int = 4, password: str = None):
+    def __init__(self, room_id: str, name: str, max_players: int = 4, password: str = None,
+                 on_change=None):
         self.room_id = room_id
         self.name = name
         self.max_players = max_players
         self.password = password
-        self.players: Dict[str, dict] = {}  # client_id -> player_info
-        self.ai_players: Dict[str, dict] = {}  # ai_id -> ai_player_info
+        self.players: Dict[str, PlayerRec] = {}  # client_id -> player_info
+        self.ai_players: Dict[str, PlayerRec] = {}  # ai_id -> ai_player_info
         self.ai_counter = 0  # AI玩家计数器
         self.created_time = time.time()
         self.host_id = None
+        # to_dict/encoded 的缓存，房间状态变化时清除
+        self._dict_cache = None
+        self._encoded_cache = None
+        # 房间状态变化时的回调（服务器据此清除房间列表缓存）
+        self._on_change = on_change
+    
+    def _invalidate(self):
+        """房间状态已变化，清除缓存"""
+        self._dict_cache = None
+        self._encoded_cache = None
+        if self._on_change is not None:
+            self._on_change()
     
     def add_player(self, client_id: str, player_name: str) -> bool:
         """添加玩家"""
@@ -55,14 +210,8 @@ class GameRoom:
         if not self.host_id:
             self.host_id = client_id
         
-        self.players[client_id] = {
-            "client_id": client_id,
-            "name": player_name,
-            "is_ready": False,
-            "is_host": client_id == self.host_id,
-            "is_ai": False,
-            "join_time": time.time()
-        }
+        self.players[client_id] = PlayerRec(client_id, player_name)
+        self._invalidate()
         return True
     
     def add_ai_player(self, difficulty: str = "简单") -> str:
@@ -74,15 +223,9 @@ class GameRoom:
         ai_id = f"ai_{self.room_id}_{self.ai_counter}"
         ai_name = f"AI玩家{self.ai_counter}({difficulty})"
         
-        self.ai_players[ai_id] = {
-            "client_id": ai_id,
-            "name": ai_name,
-            "is_ready": True,  # AI玩家总是准备状态
-            "is_host": False,
-            "is_ai": True,
-            "difficulty": difficulty,
-            "join_time": time.time()
-        }
+        # AI玩家总是准备状态
+        self.ai_players[ai_id] = PlayerRec(ai_id, ai_name, is_ready=True, is_ai=True, difficulty=difficulty)
+        self._invalidate()
         
         return ai_id
     
@@ -94,56 +237,134 @@ class GameRoom:
             # 如果房主离开，选择新房主
             if client_id == self.host_id and self.players:
                 self.host_id = next(iter(self.players.keys()))
-                self.players[self.host_id]["is_host"] = True
+            self._invalidate()
         elif client_id in self.ai_players:
             del self.ai_players[client_id]
+            self._invalidate()
     
     def remove_ai_player(self, ai_id: str) -> bool:
         """移除AI玩家"""
         if ai_id in self.ai_players:
             del self.ai_players[ai_id]
+            self._invalidate()
             return True
         return False
     
-    def get_all_players(self) -> List[dict]:
+    def set_ready(self, client_id: str, ready: bool) -> bool:
+        """更新玩家准备状态"""
+        if client_id not in self.players:
+            return False
+        self.players[client_id].is_ready = ready
+        self._invalidate()
+        return True
+    
+    def get_all_players(self) -> List[PlayerRec]:
         """获取所有玩家（包括AI）"""
         all_players = list(self.players.values()) + list(self.ai_players.values())
         return all_players
     
     def to_dict(self) -> dict:
-        """转换为字典"""
-        all_players = self.get_all_players()
-        return {
-            "room_id": self.room_id,
-            "name": self.name,
-            "current_players": len(all_players),
-            "max_players": self.max_players,
-            "has_password": bool(self.password),
-            "players": all_players,
-            "ai_count": len(self.ai_players)
-        }
+        """转换为字典（缓存结果，调用方不应修改）"""
+        if self._dict_cache is None:
+            host_id = self.host_id
+            all_players = [player.to_dict(player.client_id == host_id) for player in self.get_all_players()]
+            self._dict_cache = {
+                "room_id": self.room_id,
+                "name": self.name,
+                "current_players": len(all_players),
+                "max_players": self.max_players,
+                "has_password": bool(self.password),
+                "players": all_players,
+                "ai_count": len(self.ai_players)
+            }
+        return self._dict_cache
+    
+    def encoded(self, encode=encode_message):
+        """序列化后的房间信息（缓存结果），可直接嵌入消息帧"""
+        cache = self._encoded_cache
+        if cache is None or cache[0] is not encode:
+            cache = self._encoded_cache = (encode, encode(self.to_dict()))
+        return cache[1]
 
 class RoomServer:
     """房间管理服务器"""
-    def __init__(self):
-        self.clients: Dict[str, dict] = {}  # client_id -> client_info
+    # 消息分发表：message_type -> handler(self, client_id, message_data)
+    _HANDLERS = {
+        "heartbeat": lambda self, client_id, data: self.handle_heartbeat(client_id),
+        "create_room": lambda self, client_id, data: self.handle_create_room(client_id, data),
+        "join_room": lambda self, client_id, data: self.handle_join_room(client_id, data),
+        "leave_room": lambda self, client_id, data: self.handle_leave_room(client_id),
+        "room_list": lambda self, client_id, data: self.handle_room_list(client_id),
+        "add_ai_player": lambda self, client_id, data: self.handle_add_ai_player(client_id, data),
+        "remove_ai_player": lambda self, client_id, data: self.handle_remove_ai_player(client_id, data),
+        "player_ready": lambda self, client_id, data: self.handle_player_ready(client_id, data),
+        "player_action": lambda self, client_id, data: self.handle_player_action(client_id, data),
+    }
+    
+    def __init__(self, binary: bool = False):
+        # 消息编码：默认JSON，binary 为 True 时使用 MessagePack
+        self._codec = MsgpackCodec() if binary else JsonCodec()
+        self.clients: Dict[str, ClientRec] = {}  # client_id -> client_info
         self.rooms: Dict[str, GameRoom] = {}  # room_id -> GameRoom
-        self.websockets: Dict[str, object] = {}  # client_id -> websocket
+        
+        # 递增的客户端/房间ID，进程内不会重复
+        self._client_ids = itertools.count(1)
+        self._room_ids = itertools.count(1)
+        
+        # 解析大消息用的线程池，首次需要时创建，不占用默认线程池
+        self._decode_executor = None
+        
+        # 缓存的当前时间及对应的消息信封结尾，由时钟任务定期刷新
+        self._clock_task = None
+        self._reaper_task = None
+        # 进行中的关闭连接任务，保持引用避免任务在完成前被回收
+        self._close_tasks = set()
+        # room_list 消息 data 部分的缓存，房间创建、删除或状态变化时清除
+        self._room_list_cache = None
+        self._refresh_clock()
+    
+    def _refresh_clock(self):
+        """刷新缓存的时间戳"""
+        self._now = time.time()
+        self._envelope_tail = self._codec.tail(self._now)
+        # 心跳帧只依赖时间戳，每个时钟周期最多构造一次
+        self._heartbeat_frame = None
+    
+    async def _tick_clock(self):
+        """时钟任务：定期刷新时间戳，避免每条消息都取时间并格式化"""
+        while True:
+            await asyncio.sleep(CLOCK_INTERVAL)
+            self._refresh_clock()
+    
+    def _wrap_encoded(self, message_type: str, encoded_data):
+        """将已序列化的 data 部分嵌入消息信封，不重新序列化"""
+        return self._codec.head(message_type) + encoded_data + self._envelope_tail
+    
+    def _invalidate_room_list(self):
+        """房间集合或某个房间状态已变化，清除房间列表缓存"""
+        self._room_list_cache = None
+    
+    def _coalesce_frames(self, frames):
+        """将多个已序列化的帧拼接成一个 multi 信封帧，不重新序列化各条消息"""
+        return self._wrap_encoded("multi", self._codec.array(frames))
     
     async def handle_client(self, websocket, path=None):
         """处理客户端连接"""
-        client_id = f"client_{id(websocket)}"
+        client_id = f"client_{next(self._client_ids)}"
         print(f"👤 客户端连接: {client_id}")
         
+        # 第一个客户端连接时启动时钟任务和清理任务
+        if self._clock_task is None:
+            self._refresh_clock()
+            self._clock_task = asyncio.create_task(self._tick_clock())
+            self._reaper_task = asyncio.create_task(self._reap_closed_clients())
+        
+        # 每个连接一个发送队列和一个写任务，发送方只需入队，不会被慢客户端阻塞
+        out_queue = asyncio.Queue(OUT_QUEUE_SIZE)
+        writer = asyncio.create_task(self._writer_loop(client_id, websocket, out_queue))
+        
         # 注册客户端
-        self.clients[client_id] = {
-            "client_id": client_id,
-            "websocket": websocket,
-            "player_name": None,
-            "room_id": None,
-            "connect_time": time.time()
-        }
-        self.websockets[client_id] = websocket
+        client = self.clients[client_id] = ClientRec(client_id, websocket, out_queue, writer)
         
         try:
             # 发送欢迎消息
@@ -153,16 +374,26 @@ class RoomServer:
                     "message": "欢迎连接大富翁服务器！",
                     "client_id": client_id
                 },
-                "timestamp": time.time(),
+                "timestamp": self._now,
                 "sender_id": "server"
             })
             
+            decode = self._codec.decode
             async for message in websocket:
+                # 先限流再解析，超限的消息不占用解析时间
+                if self._rate_limited(client):
+                    continue
+                try:
+                    if len(message) > LARGE_MESSAGE_SIZE:
+                        data = await self._decode_large(message)
+                    else:
+                        data = decode(message)
+                except (ValueError, TypeError):
+                    await self.send_error(client_id, self._codec.invalid_format_error)
+                    continue
+                
                 try:
-                    data = json.loads(message)
                     await self.handle_message(client_id, data)
-                except json.JSONDecodeError:
-                    await self.send_error(client_id, "无效的JSON格式")
                 except Exception as e:
                     print(f"处理消息错误: {e}")
                     await self.send_error(client_id, f"处理消息失败: {e}")
@@ -173,6 +404,25 @@ class RoomServer:
             await self.cleanup_client(client_id)
             print(f"👋 客户端断开: {client_id}")
     
+    def _rate_limited(self, client: ClientRec) -> bool:
+        """记录一条消息的到达时间，最近 RATE_WINDOW 秒内已满 RATE_LIMIT 条时返回True"""
+        recent = client.recent_messages
+        now = self._now
+        if len(recent) == RATE_LIMIT and now - recent[0] < RATE_WINDOW:
+            # 错误回复可丢弃，避免刷屏的客户端因此被断开
+            self._send_raw(client.client_id, self._text_frame("error", "error", "消息过于频繁"), droppable=True)
+            return True
+        recent.append(now)
+        return False
+    
+    async def _decode_large(self, message):
+        """在专用线程池中解析大消息"""
+        if self._decode_executor is None:
+            self._decode_executor = ThreadPoolExecutor(
+                max_workers=min(4, os.cpu_count() or 1), thread_name_prefix="decode")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._decode_executor, self._codec.decode, message)
+    
     async def handle_message(self, client_id: str, data: dict):
         """处理客户端消息"""
         message_type = data.get("message_type")
@@ -180,35 +430,22 @@ class RoomServer:
         
         print(f"📨 收到消息 [{client_id}]: {message_type}")
         
-        if message_type == "heartbeat":
-            await self.handle_heartbeat(client_id)
-        elif message_type == "create_room":
-            await self.handle_create_room(client_id, message_data)
-        elif message_type == "join_room":
-            await self.handle_join_room(client_id, message_data)
-        elif message_type == "leave_room":
-            await self.handle_leave_room(client_id)
-        elif message_type == "room_list":
-            await self.handle_room_list(client_id)
-        elif message_type == "add_ai_player":
-            await self.handle_add_ai_player(client_id, message_data)
-        elif message_type == "remove_ai_player":
-            await self.handle_remove_ai_player(client_id, message_data)
-        elif message_type == "player_ready":
-            await self.handle_player_ready(client_id, message_data)
-        elif message_type == "player_action":
-            await self.handle_player_action(client_id, message_data)
+        # message_type 来自客户端，可能不是可哈希的类型
+        handler = self._HANDLERS.get(message_type) if isinstance(message_type, str) else None
+        if handler:
+            await handler(self, client_id, message_data)
         else:
             await self.send_response(client_id, f"收到消息类型: {message_type}")
     
     async def handle_heartbeat(self, client_id: str):
         """处理心跳"""
-        await self.send_message(client_id, {
-            "message_type": "heartbeat",
-            "data": {"timestamp": time.time()},
-            "timestamp": time.time(),
-            "sender_id": "server"
-        })
+        frame = self._heartbeat_frame
+        if frame is None:
+            frame = self._heartbeat_frame = self._wrap_encoded(
+                "heartbeat", self._codec.field("timestamp", self._codec.encode(self._now)))
+        
+        # 心跳可丢弃：发送队列已满时直接跳过，不断开客户端
+        self._send_raw(client_id, frame, droppable=True)
     
     async def handle_create_room(self, client_id: str, data: dict):
         """处理创建房间"""
@@ -226,14 +463,15 @@ class RoomServer:
             return
         
         # 创建房间
-        room_id = str(uuid.uuid4())[:8]
-        room = GameRoom(room_id, room_name, max_players, password)
+        room_id = format(next(self._room_ids), "08x")
+        room = GameRoom(room_id, room_name, max_players, password, self._invalidate_room_list)
         
         # 添加创建者为第一个玩家
         if room.add_player(client_id, player_name):
             self.rooms[room_id] = room
-            self.clients[client_id]["room_id"] = room_id
-            self.clients[client_id]["player_name"] = player_name
+            self._invalidate_room_list()
+            self.clients[client_id].room_id = room_id
+            self.clients[client_id].player_name = player_name
             
             await self.send_success(client_id, f"成功创建房间: {room_name}")
             await self.send_room_info(room_id)
@@ -260,8 +498,8 @@ class RoomServer:
         
         # 加入房间
         if room.add_player(client_id, player_name):
-            self.clients[client_id]["room_id"] = room_id
-            self.clients[client_id]["player_name"] = player_name
+            self.clients[client_id].room_id = room_id
+            self.clients[client_id].player_name = player_name
             
             await self.send_success(client_id, f"成功加入房间: {room.name}")
             await self.send_room_info(room_id)
@@ -271,18 +509,19 @@ class RoomServer:
     
     async def handle_leave_room(self, client_id: str):
         """处理离开房间"""
-        room_id = self.clients[client_id].get("room_id")
+        room_id = self.clients[client_id].room_id
         if not room_id or room_id not in self.rooms:
             await self.send_error(client_id, "不在任何房间中")
             return
         
         room = self.rooms[room_id]
         room.remove_player(client_id)
-        self.clients[client_id]["room_id"] = None
+        self.clients[client_id].room_id = None
         
         # 如果房间为空，删除房间
         if not room.players:
             del self.rooms[room_id]
+            self._invalidate_room_list()
             print(f"🗑️ 房间已删除: {room.name}")
         else:
             await self.send_room_info(room_id)
@@ -291,13 +530,12 @@ class RoomServer:
     
     async def handle_room_list(self, client_id: str):
         """处理房间列表请求"""
-        room_list = [room.to_dict() for room in self.rooms.values()]
-        await self.send_message(client_id, {
-            "message_type": "room_list",
-            "data": {"rooms": room_list},
-            "timestamp": time.time(),
-            "sender_id": "server"
-        })
+        # 房间列表无变化时直接复用上次拼好的 data；只有信封（时间戳）每次重新拼接
+        if self._room_list_cache is None:
+            encode = self._codec.encode
+            rooms = self._codec.array([room.encoded(encode) for room in self.rooms.values()])
+            self._room_list_cache = self._codec.field("rooms", rooms)
+        self._send_raw(client_id, self._wrap_encoded("room_list", self._room_list_cache))
     
     async def send_room_info(self, room_id: str):
         """向房间所有玩家发送房间信息"""
@@ -305,76 +543,122 @@ class RoomServer:
             return
         
         room = self.rooms[room_id]
-        room_info = room.to_dict()
         
-        for player_id in room.players:
-            await self.send_message(player_id, {
-                "message_type": "room_info",
-                "data": {"room": room_info},
-                "timestamp": time.time(),
-                "sender_id": "server"
-            })
+        # 所有玩家收到的内容相同，只拼接一次，房间信息使用缓存的序列化结果
+        frame = self._wrap_encoded("room_info", self._codec.field("room", room.encoded(self._codec.encode)))
+        self._broadcast_raw(room.players, frame)
+    
+    def _build_frame(self, message: dict):
+        """将消息序列化为可直接发送的帧"""
+        return self._codec.encode(message)
+    
+    def _send_raw(self, client_id: str, frame, droppable: bool = False):
+        """将已序列化的帧放入客户端发送队列（不阻塞）"""
+        client = self.clients.get(client_id)
+        out_queue = client.out_queue if client else None
+        if out_queue is None:
+            return
+        try:
+            out_queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            if droppable:
+                return
+            # 关键消息放不进队列，说明客户端长期不读，断开它而不是无限积压
+            print(f"⚠️ 客户端 {client_id} 发送队列已满，断开连接")
+            client.out_queue = None
+            task = asyncio.create_task(client.websocket.close(1008, "发送队列已满"))
+            self._close_tasks.add(task)
+            task.add_done_callback(self._close_tasks.discard)
+    
+    def _broadcast_raw(self, client_ids, frame):
+        """将同一帧放入多个客户端的发送队列"""
+        for cid in client_ids:
+            self._send_raw(cid, frame)
+    
+    async def _writer_loop(self, client_id: str, websocket, out_queue: asyncio.Queue):
+        """客户端写任务：按顺序取出队列中的帧并发送，积压的帧合并为一个 multi 帧"""
+        send = websocket.send
+        get = out_queue.get
+        get_nowait = out_queue.get_nowait
+        try:
+            while True:
+                frame = await get()
+                if out_queue.empty():
+                    await send(frame)
+                    continue
+                
+                frames = [frame]
+                size = len(frame)
+                while size < MULTI_FRAME_LIMIT and not out_queue.empty():
+                    frame = get_nowait()
+                    frames.append(frame)
+                    size += len(frame)
+                await send(self._coalesce_frames(frames))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"发送消息失败 [{client_id}]: {e}")
+            # 连接已不可用：不再接收新的帧，关闭连接，由 handle_client 的 finally 统一清理
+            client = self.clients.get(client_id)
+            if client is not None:
+                client.out_queue = None
+            await websocket.close()
     
     async def send_message(self, client_id: str, message: dict):
         """发送消息给客户端"""
-        if client_id in self.websockets:
-            try:
-                await self.websockets[client_id].send(json.dumps(message, ensure_ascii=False))
-            except Exception as e:
-                print(f"发送消息失败 [{client_id}]: {e}")
+        if client_id in self.clients:
+            self._send_raw(client_id, self._build_frame(message))
+    
+    def _text_frame(self, message_type: str, key: str, text: str):
+        """构造 data 只含一个文本字段的消息帧，只序列化文本本身，不构造消息字典"""
+        return self._wrap_encoded(message_type, self._codec.field(key, self._codec.encode(text)))
     
     async def send_success(self, client_id: str, message: str):
         """发送成功消息"""
-        await self.send_message(client_id, {
-            "message_type": "success",
-            "data": {"message": message},
-            "timestamp": time.time(),
-            "sender_id": "server"
-        })
+        self._send_raw(client_id, self._text_frame("success", "message", message))
     
     async def send_error(self, client_id: str, error: str):
         """发送错误消息"""
-        await self.send_message(client_id, {
-            "message_type": "error",
-            "data": {"error": error},
-            "timestamp": time.time(),
-            "sender_id": "server"
-        })
+        self._send_raw(client_id, self._text_frame("error", "error", error))
     
     async def send_response(self, client_id: str, message: str):
         """发送响应消息"""
-        await self.send_message(client_id, {
-            "message_type": "response",
-            "data": {"message": message},
-            "timestamp": time.time(),
-            "sender_id": "server"
-        })
+        self._send_raw(client_id, self._text_frame("response", "message", message))
     
     async def cleanup_client(self, client_id: str):
         """清理客户端"""
         # 离开房间
         if client_id in self.clients:
-            room_id = self.clients[client_id].get("room_id")
+            room_id = self.clients[client_id].room_id
             if room_id and room_id in self.rooms:
                 room = self.rooms[room_id]
                 room.remove_player(client_id)
                 
                 if not room.players:
                     del self.rooms[room_id]
+                    self._invalidate_room_list()
                     print(f"🗑️ 房间已删除: {room.name}")
                 else:
                     await self.send_room_info(room_id)
         
-        # 清理客户端信息
+        # 清理客户端信息，停止写任务
         if client_id in self.clients:
-            del self.clients[client_id]
-        if client_id in self.websockets:
-            del self.websockets[client_id]
+            self.clients.pop(client_id).writer.cancel()
+    
+    async def _reap_closed_clients(self):
+        """清理任务：定期注销连接已关闭却仍在登记中的客户端，保证残留记录有上限"""
+        while True:
+            await asyncio.sleep(REAP_INTERVAL)
+            closed = [client_id for client_id, client in self.clients.items()
+                      if client.websocket.close_code is not None]
+            for client_id in closed:
+                print(f"🧹 清理已断开的客户端: {client_id}")
+                await self.cleanup_client(client_id)
     
     async def handle_add_ai_player(self, client_id: str, data: dict):
         """处理添加AI玩家请求"""
         # 检查客户端是否在房间中
-        room_id = self.clients[client_id].get("room_id")
+        room_id = self.clients[client_id].room_id
         if not room_id or room_id not in self.rooms:
             await self.send_error(client_id, "不在任何房间中")
             return
@@ -400,7 +684,7 @@ class RoomServer:
     async def handle_remove_ai_player(self, client_id: str, data: dict):
         """处理移除AI玩家请求"""
         # 检查客户端是否在房间中
-        room_id = self.clients[client_id].get("room_id")
+        room_id = self.clients[client_id].room_id
         if not room_id or room_id not in self.rooms:
             await self.send_error(client_id, "不在任何房间中")
             return
@@ -424,7 +708,7 @@ class RoomServer:
     async def handle_player_ready(self, client_id: str, data: dict):
         """处理玩家准备状态"""
         # 检查客户端是否在房间中
-        room_id = self.clients[client_id].get("room_id")
+        room_id = self.clients[client_id].room_id
         if not room_id or room_id not in self.rooms:
             await self.send_error(client_id, "不在任何房间中")
             return
@@ -432,10 +716,8 @@ class RoomServer:
         room = self.rooms[room_id]
         
         # 更新玩家准备状态
-        if client_id in room.players:
-            is_ready = data.get("ready", True)
-            room.players[client_id]["is_ready"] = is_ready
-            
+        is_ready = data.get("ready", True)
+        if room.set_ready(client_id, is_ready):
             await self.send_success(client_id, f"准备状态更新: {'已准备' if is_ready else '未准备'}")
             await self.send_room_info(room_id)
             print(f"🎮 玩家准备状态更新 [{client_id}]: {is_ready}")
@@ -445,7 +727,7 @@ class RoomServer:
     async def handle_player_action(self, client_id: str, data: dict):
         """处理玩家操作"""
         # 检查客户端是否在房间中
-        room_id = self.clients[client_id].get("room_id")
+        room_id = self.clients[client_id].room_id
         if not room_id or room_id not in self.rooms:
             await self.send_error(client_id, "不在任何房间中")
             return
@@ -461,8 +743,7 @@ class RoomServer:
         elif action == "toggle_ready":
             # 处理准备状态切换
             ready = action_data.get("ready", True)
-            if client_id in room.players:
-                room.players[client_id]["is_ready"] = ready
+            if room.set_ready(client_id, ready):
                 await self.send_success(client_id, f"准备状态更新: {'已准备' if ready else '未准备'}")
                 await self.send_room_info(room_id)
                 print(f"🎮 玩家准备状态更新 [{client_id}]: {ready}")
@@ -480,7 +761,7 @@ class RoomServer:
         
         # 检查所有玩家是否都已准备
         all_players = room.get_all_players()
-        ready_count = sum(1 for player in all_players if player.get("is_ready", False) or player.get("is_host", False))
+        ready_count = sum(1 for player in all_players if player.is_ready or player.client_id == room.host_id)
         total_players = len(all_players)
         
         if ready_count < total_players:
@@ -503,18 +784,27 @@ class RoomServer:
             "game_mode": "multiplayer"
         }
         
-        for player_id in room.players:
-            await self.send_message(player_id, {
-                "message_type": "game_start",
-                "data": game_start_data,
-                "timestamp": time.time(),
-                "sender_id": "server"
-            })
+        frame = self._build_frame({
+            "message_type": "game_start",
+            "data": game_start_data,
+            "timestamp": self._now,
+            "sender_id": "server"
+        })
+        self._broadcast_raw(room.players, frame)
         
         print(f"🎮 房间 {room.name} 开始游戏！玩家数: {total_players}, 地图: {map_file}")
         await self.send_success(client_id, "游戏开始！")
 
-async def run_server(host="localhost", port=8765):
+def serve(server: RoomServer, sock, backlog=LISTEN_BACKLOG):
+    """在已绑定的socket上启动 websockets 服务（async with 使用），连接参数集中在这里"""
+    import websockets
+    
+    return websockets.serve(server.handle_client, sock=sock, backlog=backlog,
+                            max_size=MAX_MESSAGE_SIZE, max_queue=MAX_QUEUE,
+                            ping_interval=20, ping_timeout=10, close_timeout=5,
+                            compression=None, extensions=deflate_extensions())
+
+async def run_server(host="localhost", port=8765, binary=False, backlog=LISTEN_BACKLOG):
     """运行服务器"""
     try:
         import websockets
@@ -524,20 +814,26 @@ async def run_server(host="localhost", port=8765):
         print("请运行: pip install websockets")
         return
     
-    # 查找可用端口
-    available_port = find_available_port(host, port)
-    if not available_port:
+    # 绑定可用端口，绑定好的socket直接交给websockets，不再重复绑定
+    sock = bind_available_port(host, port)
+    if sock is None:
         print("❌ 无法找到可用端口")
         return
+    available_port = sock.getsockname()[1]
     
     print(f"🚀 启动房间管理服务器: {host}:{available_port}")
     
-    server = RoomServer()
+    if binary and not MSGPACK_AVAILABLE:
+        print("⚠️ 未安装msgpack，使用JSON格式（pip install msgpack 后可使用 --binary）")
+        binary = False
+    
+    server = RoomServer(binary)
     
     try:
         print("🎮 服务器启动中...")
-        async with websockets.serve(server.handle_client, host, available_port):
+        async with serve(server, sock, backlog):
             print(f"✅ 服务器运行在 {host}:{available_port}")
+            print(f"📦 消息格式: {'MessagePack' if binary else 'JSON'}")
             print("💡 按 Ctrl+C 停止服务器")
             print("🔗 客户端可以连接到: ws://localhost:" + str(available_port))
             
@@ -550,12 +846,23 @@ async def run_server(host="localhost", port=8765):
 
 def main():
     """主函数"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="大富翁房间管理服务器")
+    parser.add_argument("--binary", action="store_true", help="使用MessagePack二进制消息（需要安装msgpack）")
+    args = parser.parse_args()
+    
     print("=" * 50)
     print("🎮 大富翁房间管理服务器")
     print("=" * 50)
     
+    # 安装了uvloop时使用libuv事件循环（pip install uvloop，不支持Windows）
+    if UVLOOP_AVAILABLE:
+        uvloop.install()
+        print("⚡ 事件循环: uvloop")
+    
     try:
-        asyncio.run(run_server())
+        asyncio.run(run_server(binary=args.binary))
     except KeyboardInterrupt:
         print("\n⌨️ 用户停止服务器")
     except Exception as e:
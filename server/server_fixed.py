@@ -6,9 +6,10 @@
 """
 
 import asyncio
+import itertools
 import json
 import logging
-import uuid
+import os
 import traceback
 
 # 设置日志
@@ -25,25 +26,34 @@ except ImportError:
     exit(1)
 
 class SimpleGameServer:
+    # 内容固定的响应，只序列化一次
+    _HEARTBEAT_OK = json.dumps({"type": "heartbeat", "status": "ok"}, ensure_ascii=False)
+    _TEST_RESPONSE = json.dumps({"type": "test_response", "message": "服务器连接正常"}, ensure_ascii=False)
+    
     def __init__(self, host: str = "localhost", port: int = 8765):
         self.host = host
         self.port = port
         self.clients = {}
         self.rooms = {}
         self.is_running = False
+        # 递增的客户端ID，进程内不会重复
+        self._client_ids = itertools.count(1)
     
-    async def find_available_port(self, start_port: int = 8765, max_tries: int = 10):
-        """寻找可用端口"""
+    async def bind_available_port(self, start_port: int = 8765, max_tries: int = 10):
+        """绑定可用端口，返回已绑定的socket"""
         import socket
         
         for i in range(max_tries):
             test_port = start_port + i
+            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             try:
-                # 测试端口是否可用
-                with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                    s.bind((self.host, test_port))
-                return test_port
+                # Windows上SO_REUSEADDR允许抢占占用中的端口，不能设置
+                if os.name != "nt":
+                    s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                s.bind((self.host, test_port))
+                return s
             except OSError:
+                s.close()
                 print(f"⚠️ 端口 {test_port} 被占用，尝试下一个...")
                 continue
         
@@ -52,17 +62,16 @@ class SimpleGameServer:
     async def start(self):
         """启动服务器"""
         try:
-            # 寻找可用端口
-            available_port = await self.find_available_port(self.port)
-            self.port = available_port
+            # 绑定可用端口，绑定好的socket直接交给websockets
+            sock = await self.bind_available_port(self.port)
+            self.port = sock.getsockname()[1]
             
             print(f"🚀 启动服务器 - {self.host}:{self.port}")
             
             # 启动websocket服务器
             server = await websockets.serve(
                 self.handle_client,
-                self.host,
-                self.port,
+                sock=sock,
                 ping_interval=20,
                 ping_timeout=10
             )
@@ -81,7 +90,7 @@ class SimpleGameServer:
 
     async def handle_client(self, websocket):
         """处理客户端连接"""
-        client_id = str(uuid.uuid4())[:8]
+        client_id = format(next(self._client_ids), "08x")
         
         try:
             # 注册客户端
@@ -125,20 +134,26 @@ class SimpleGameServer:
         message_type = data.get("type", "")
         
         if message_type == "heartbeat":
-            await self.send_to_client(client_id, {"type": "heartbeat", "status": "ok"})
+            await self._send_frame(client_id, self._HEARTBEAT_OK)
         elif message_type == "test":
-            await self.send_to_client(client_id, {"type": "test_response", "message": "服务器连接正常"})
+            await self._send_frame(client_id, self._TEST_RESPONSE)
         else:
             await self.send_error(client_id, f"未知消息类型: {message_type}")
 
     async def send_to_client(self, client_id: str, message: dict):
         """发送消息给客户端"""
         if client_id in self.clients:
-            websocket = self.clients[client_id]["websocket"]
-            try:
-                await websocket.send(json.dumps(message, ensure_ascii=False))
-            except Exception as e:
-                print(f"发送消息失败: {e}")
+            await self._send_frame(client_id, json.dumps(message, ensure_ascii=False))
+    
+    async def _send_frame(self, client_id: str, frame: str):
+        """发送已序列化的消息给客户端"""
+        client = self.clients.get(client_id)
+        if client is None:
+            return
+        try:
+            await client["websocket"].send(frame)
+        except Exception as e:
+            print(f"发送消息失败: {e}")
 
     async def send_error(self, client_id: str, error_msg: str):
         """发送错误消息"""
@@ -12,7 +12,13 @@ from pathlib import Path
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
-from src.network.server.game_server import GameServer
+from src.network.server.game_server import GameServer, LISTEN_BACKLOG
+
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
 
 # 配置日志
 logging.basicConfig(
@@ -33,13 +39,13 @@ class ServerLauncher:
         self.server = None
         self.shutdown_event = asyncio.Event()
     
-    async def start_server(self, host: str = "localhost", port: int = 8765):
+    async def start_server(self, host: str = "localhost", port: int = 8765, backlog: int = LISTEN_BACKLOG):
         """启动服务器"""
         try:
             logger.info("🚀 正在启动大富翁联机游戏服务器...")
             
             # 创建服务器实例
-            self.server = GameServer(host, port)
+            self.server = GameServer(host, port, backlog)
             
             # 设置信号处理
             self._setup_signal_handlers()
@@ -98,6 +104,12 @@ class ServerLauncher:
             logger.info("✅ 服务器已关闭")
 
 
+def _install_uvloop():
+    """安装了uvloop时使用libuv事件循环（pip install uvloop，不支持Windows）"""
+    if UVLOOP_AVAILABLE:
+        uvloop.install()
+
+
 def main():
     """主函数"""
     import argparse
@@ -106,6 +118,7 @@ def main():
     parser.add_argument("--host", default="localhost", help="服务器主机地址")
     parser.add_argument("--port", type=int, default=8765, help="服务器端口")
     parser.add_argument("--debug", action="store_true", help="启用调试模式")
+    parser.add_argument("--backlog", type=int, default=LISTEN_BACKLOG, help="监听socket的accept队列长度")
     
     args = parser.parse_args()
     
@@ -120,15 +133,17 @@ def main():
     print("=" * 60)
     print(f"📍 服务器地址: {args.host}:{args.port}")
     print(f"🔧 调试模式: {'开启' if args.debug else '关闭'}")
+    print(f"⚡ 事件循环: {'uvloop' if UVLOOP_AVAILABLE else 'asyncio'}")
     print("=" * 60)
     print("💡 使用 Ctrl+C 停止服务器")
     print("=" * 60)
     
     # 启动服务器
+    _install_uvloop()
     launcher = ServerLauncher()
     
     try:
-        asyncio.run(launcher.start_server(args.host, args.port))
+        asyncio.run(launcher.start_server(args.host, args.port, backlog=args.backlog))
     except KeyboardInterrupt:
         pass
     except Exception as e:
@@ -4,11 +4,32 @@
 大富翁联机游戏服务器 - 简化实现
 """
 import asyncio
+import itertools
 import json
+import os
+import sys
+import time
 import websockets
 import logging
+from collections import deque
 from typing import Dict, Set
 
+# 将项目根目录加入Python路径以导入 src 下的共享模块（已在路径中则跳过）
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.network.wire import (
+    encode_message, decode_message, deflate_extensions, OUT_QUEUE_SIZE,
+    MAX_MESSAGE_SIZE, MAX_QUEUE, RATE_LIMIT, RATE_WINDOW, LISTEN_BACKLOG,
+)
+
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -17,12 +38,20 @@ logger = logging.getLogger(__name__)
 class SimpleGameServer:
     """简化游戏服务器"""
     
+    # 内容固定的响应，只序列化一次
+    _HEARTBEAT_OK = encode_message({"type": "heartbeat", "status": "ok"})
+    
     def __init__(self, host: str = "localhost", port: int = 8765):
         self.host = host
         self.port = port
         self.clients: Dict = {}
         self.rooms: Dict = {}
         self.is_running = False
+        # 递增的客户端/房间ID，进程内不会重复
+        self._client_ids = itertools.count(1)
+        self._room_ids = itertools.count(1)
+        # 进行中的关闭连接任务，保持引用避免任务在完成前被回收
+        self._close_tasks = set()
     
     async def start(self):
         """启动服务器"""
@@ -37,8 +66,14 @@ class SimpleGameServer:
                     self.handle_client,
                     self.host,
                     port,
+                    backlog=LISTEN_BACKLOG,
+                    max_size=MAX_MESSAGE_SIZE,
+                    max_queue=MAX_QUEUE,
                     ping_interval=20,
-                    ping_timeout=10
+                    ping_timeout=10,
+                    close_timeout=5,
+                    compression=None,
+                    extensions=deflate_extensions()
                 ):
                     self.is_running = True
                     self.port = port  # 更新实际使用的端口
@@ -64,14 +99,18 @@ class SimpleGameServer:
         client_id = None
         try:
             # 生成客户端ID
-            import uuid
-            client_id = str(uuid.uuid4())[:8]
+            client_id = format(next(self._client_ids), "08x")
+            
+            # 每个连接一个发送队列和一个写任务，发送方只需入队
+            out_queue = asyncio.Queue(OUT_QUEUE_SIZE)
             
             # 注册客户端
             self.clients[client_id] = {
                 "websocket": websocket,
                 "room_id": None,
-                "player_name": None
+                "player_name": None,
+                "out_queue": out_queue,
+                "writer": asyncio.create_task(self._writer_loop(client_id, websocket, out_queue))
             }
             
             logger.info(f"👤 客户端连接: {client_id}")
@@ -83,10 +122,16 @@ class SimpleGameServer:
                 "client_id": client_id
             })
             
-            # 处理消息
+            # 处理消息，先限流再解析
+            recent = deque(maxlen=RATE_LIMIT)
             async for message in websocket:
+                now = time.monotonic()
+                if len(recent) == RATE_LIMIT and now - recent[0] < RATE_WINDOW:
+                    await self.send_error(client_id, "消息过于频繁")
+                    continue
+                recent.append(now)
                 try:
-                    data = json.loads(message)
+                    data = decode_message(message)
                     await self.handle_message(client_id, data)
                 except json.JSONDecodeError:
                     await self.send_error(client_id, "无效的JSON格式")
@@ -99,16 +144,16 @@ class SimpleGameServer:
         except Exception as e:
             logger.error(f"客户端处理错误: {e}")
         finally:
-            # 清理客户端
+            # 清理客户端，停止写任务
             if client_id and client_id in self.clients:
-                del self.clients[client_id]
+                self.clients.pop(client_id)["writer"].cancel()
     
     async def handle_message(self, client_id: str, data: dict):
         """处理客户端消息"""
         message_type = data.get("type", "")
         
         if message_type == "heartbeat":
-            await self.send_to_client(client_id, {"type": "heartbeat", "status": "ok"})
+            self._send_frame(client_id, self._HEARTBEAT_OK)
         
         elif message_type == "room_list":
             await self.send_room_list(client_id)
@@ -144,8 +189,7 @@ class SimpleGameServer:
     
     async def create_room(self, client_id: str, data: dict):
         """创建房间"""
-        import uuid
-        room_id = str(uuid.uuid4())[:8]
+        room_id = format(next(self._room_ids), "08x")
         room_name = data.get("room_name", f"房间{room_id}")
         max_players = data.get("max_players", 4)
         
@@ -235,13 +279,42 @@ class SimpleGameServer:
         logger.info(f"💬 聊天: {sender_name}: {content}")
     
     async def send_to_client(self, client_id: str, message: dict):
-        """发送消息给客户端"""
+        """发送消息给客户端（放入发送队列，不阻塞）"""
         if client_id in self.clients:
-            websocket = self.clients[client_id]["websocket"]
-            try:
-                await websocket.send(json.dumps(message, ensure_ascii=False))
-            except Exception as e:
-                logger.error(f"发送消息失败: {e}")
+            self._send_frame(client_id, encode_message(message))
+    
+    def _send_frame(self, client_id: str, frame):
+        """将已序列化的消息放入客户端发送队列"""
+        client = self.clients.get(client_id)
+        out_queue = client.get("out_queue") if client else None
+        if out_queue is None:
+            return
+        try:
+            out_queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            # 客户端长期不读，断开它而不是无限积压
+            logger.warning(f"客户端 {client_id} 发送队列已满，断开连接")
+            del client["out_queue"]
+            task = asyncio.create_task(client["websocket"].close(1008, "发送队列已满"))
+            self._close_tasks.add(task)
+            task.add_done_callback(self._close_tasks.discard)
+    
+    async def _writer_loop(self, client_id: str, websocket, out_queue: asyncio.Queue):
+        """客户端写任务：按顺序取出队列中的消息并发送"""
+        send = websocket.send
+        get = out_queue.get
+        try:
+            while True:
+                await send(await get())
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"发送消息失败 [{client_id}]: {e}")
+            # 连接已不可用：不再接收新的消息，关闭连接，由 handle_client 的 finally 注销客户端
+            client = self.clients.get(client_id)
+            if client is not None:
+                client.pop("out_queue", None)
+            await websocket.close()
     
     async def send_error(self, client_id: str, error_msg: str):
         """发送错误消息"""
@@ -271,6 +344,10 @@ async def main():
         print("🔧 正在检查依赖...")
         import websockets
         print(f"✅ websockets {websockets.__version__}")
+        if UVLOOP_AVAILABLE:
+            print("⚡ 事件循环: uvloop")
+        else:
+            print("💡 事件循环: asyncio（Linux/macOS 上可 pip install uvloop 提升网络性能）")
         
         print("📍 服务器地址: localhost:8765")
         print("💡 使用 Ctrl+C 停止服务器")
@@ -294,6 +371,10 @@ async def main():
 
 def main_wrapper():
     """主函数包装器，处理错误并防止窗口秒关"""
+    # 安装了uvloop时使用libuv事件循环（不支持Windows，未安装时使用标准asyncio）
+    if UVLOOP_AVAILABLE:
+        uvloop.install()
+    
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
@@ -9,6 +9,12 @@ import logging
 import sys
 import os
 
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+
 # 添加项目路径
 sys.path.append(os.path.dirname(__file__))
 
@@ -62,6 +68,7 @@ async def main():
         print(f"🌐 服务器地址: ws://{args.host}:{args.port}")
         print(f"👥 最大连接数: {args.max_connections}")
         print(f"🏠 最大房间数: {args.max_rooms}")
+        print(f"⚡ 事件循环: {'uvloop' if UVLOOP_AVAILABLE else 'asyncio（可 pip install uvloop 提升网络性能）'}")
         print("-" * 40)
         print("按 Ctrl+C 停止服务器")
         print()
@@ -84,6 +91,10 @@ async def main():
 
 
 if __name__ == "__main__":
+    # 安装了uvloop时使用libuv事件循环（不支持Windows，未安装时使用标准asyncio）
+    if UVLOOP_AVAILABLE:
+        uvloop.install()
+    
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
@@ -186,6 +186,8 @@ class Map:
         self.path = []   # 路径点列表
         self.path_length = 0  # 路径总长度
         self.junctions = set()  # 岔路口集合
+        # 房产位置编号 -> (行, 列) 预计算表，避免重复divmod
+        self._rc_table = [divmod(pos, width) for pos in range(width * height)]
         
         self._initialize_map()
         self._setup_path()
@@ -523,6 +525,31 @@ class Map:
             return self.cells[index]
         return None
     
+    def pos_of(self, row: int, col: int) -> int:
+        """
+        将(行, 列)转换为房产位置编号
+        
+        Args:
+            row: 行
+            col: 列
+            
+        Returns:
+            int: 位置编号
+        """
+        return row * self.width + col
+    
+    def rc_of(self, pos: int) -> Tuple[int, int]:
+        """
+        将房产位置编号转换为(行, 列)
+        
+        Args:
+            pos: 位置编号
+            
+        Returns:
+            Tuple[int, int]: (行, 列)，位置无效时抛出IndexError
+        """
+        return self._rc_table[pos]
+    
     def set_cell_type(self, position: Tuple[int, int], cell_type: str) -> bool:
         """
         设置格子类型
@@ -4,6 +4,9 @@
 from typing import Dict, Optional
 from src.core.constants import PROPERTY_LEVELS
 
+# 房产等级名称，按等级下标索引
+LEVEL_NAMES = ("空地", "一级房产", "二级房产", "三级房产", "四级房产")
+
 
 class Property:
     """房产类"""
@@ -136,14 +139,9 @@ class Property:
         Returns:
             str: 等级名称
         """
-        level_names = {
-            0: "空地",
-            1: "一级房产",
-            2: "二级房产", 
-            3: "三级房产",
-            4: "四级房产"
-        }
-        return level_names.get(self.level, "未知")
+        if 0 <= self.level < len(LEVEL_NAMES):
+            return LEVEL_NAMES[self.level]
+        return "未知"
     
     def to_dict(self) -> Dict:
         """
@@ -266,19 +266,26 @@ class NetworkClient:
         try:
             async for raw_message in self.websocket:
                 try:
-                    message = NetworkMessage.from_json(raw_message)
+                    message = NetworkMessage.from_wire(raw_message)
                     
-                    # 验证消息
-                    if not MessageValidator.validate_message(message):
-                        logger.warning(f"收到无效消息: {raw_message}")
-                        continue
-                    
-                    # 更新心跳时间
-                    if message.message_type == MessageType.HEARTBEAT.value:
-                        self.last_heartbeat_received = time.time()
+                    # 服务器可能把积压的多条消息合并成一个 multi 帧，逐条展开处理
+                    if message.message_type == MessageType.MULTI.value:
+                        messages = [NetworkMessage(**item) for item in message.data]
+                    else:
+                        messages = [message]
                     
-                    # 处理消息
-                    await self._handle_message(message)
+                    for message in messages:
+                        # 验证消息
+                        if not MessageValidator.validate_message(message):
+                            logger.warning(f"收到无效消息: {raw_message}")
+                            continue
+                        
+                        # 更新心跳时间
+                        if message.message_type == MessageType.HEARTBEAT.value:
+                            self.last_heartbeat_received = time.time()
+                        
+                        # 处理消息
+                        await self._handle_message(message)
                     
                 except json.JSONDecodeError:
                     logger.warning(f"收到无效JSON消息: {raw_message}")
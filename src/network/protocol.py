@@ -6,12 +6,19 @@ from enum import Enum
 from typing import Dict, Any, Optional
 from dataclasses import dataclass, asdict
 
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
 class MessageType(Enum):
     """消息类型枚举"""
     # 连接相关
     CONNECT = "connect"
     DISCONNECT = "disconnect"
     HEARTBEAT = "heartbeat"
+    MULTI = "multi"  # 服务器合并发送的多条消息，data 为消息列表
     
     # 房间管理
     CREATE_ROOM = "create_room"
@@ -99,6 +106,15 @@ class NetworkMessage:
         data = json.loads(json_str)
         return cls(**data)
     
+    @classmethod
+    def from_wire(cls, raw) -> 'NetworkMessage':
+        """从服务器帧创建消息：文本帧和以 { 开头的字节为JSON，其余二进制帧为MessagePack"""
+        if isinstance(raw, bytes) and raw[:1] != b"{":
+            if not MSGPACK_AVAILABLE:
+                raise ValueError("收到MessagePack消息，请安装msgpack: pip install msgpack")
+            return cls(**msgpack.unpackb(raw, raw=False))
+        return cls.from_json(raw)
+    
     def to_bytes(self) -> bytes:
         """转换为字节数据"""
         json_str = self.to_json()
@@ -13,6 +13,7 @@ from websockets.server import WebSocketServerProtocol
 from src.network.server.room_manager import RoomManager
 from src.network.protocol import NetworkProtocol, MessageType, NetworkMessage
 from src.network.multiplayer_controller import MultiplayerController
+from src.network.wire import LISTEN_BACKLOG
 
 # 设置日志
 logging.basicConfig(level=logging.INFO)
@@ -22,16 +23,18 @@ logger = logging.getLogger(__name__)
 class GameServer:
     """游戏服务器"""
     
-    def __init__(self, host: str = "localhost", port: int = 8765):
+    def __init__(self, host: str = "localhost", port: int = 8765, backlog: int = LISTEN_BACKLOG):
         """
         初始化游戏服务器
         
         Args:
             host: 服务器主机地址
             port: 服务器端口
+            backlog: 监听socket的accept队列长度
         """
         self.host = host
         self.port = port
+        self.backlog = backlog
         
         # 核心组件
         self.room_manager = RoomManager()
@@ -59,7 +62,8 @@ class GameServer:
                 self.host,
                 self.port,
                 ping_interval=20,
-                ping_timeout=10
+                ping_timeout=10,
+                backlog=self.backlog
             )
             
             self.is_running = True
@@ -0,0 +1,55 @@
+"""
+联机消息的序列化与服务器连接参数
+服务器脚本与测试客户端共用，安装了orjson时用它加速
+"""
+import json
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# 每个客户端发送队列的容量，积压超过该数量视为慢客户端
+OUT_QUEUE_SIZE = 256
+
+# 入站消息上限：单条消息最大字节数（超过则websockets以1009关闭连接）与接收缓冲的帧数
+MAX_MESSAGE_SIZE = 64 * 1024
+MAX_QUEUE = 32
+
+# 每个客户端每 RATE_WINDOW 秒最多处理 RATE_LIMIT 条消息，超出的消息直接丢弃
+RATE_LIMIT = 30
+RATE_WINDOW = 1.0
+
+# 监听socket的accept队列长度（websockets默认100），应对突发的大量连接
+LISTEN_BACKLOG = 2048
+
+# permessage-deflate 参数：缩小压缩窗口和内存级别以降低每个连接的内存占用，
+# 房间信息这类键名重复的JSON在小窗口下压缩率依然很高
+DEFLATE_WINDOW_BITS = 12
+DEFLATE_MEM_LEVEL = 5
+
+
+def encode_message(message):
+    """序列化消息为str，以文本帧发送；orjson可用时用它序列化"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(message).decode()
+    return json.dumps(message, ensure_ascii=False)
+
+
+def decode_message(raw):
+    """反序列化消息（支持str与bytes）"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def deflate_extensions():
+    """permessage-deflate 扩展配置，与 compression=None 一起传给 websockets.serve"""
+    from websockets.extensions.permessage_deflate import ServerPerMessageDeflateFactory
+    
+    return [ServerPerMessageDeflateFactory(
+        server_max_window_bits=DEFLATE_WINDOW_BITS,
+        client_max_window_bits=DEFLATE_WINDOW_BITS,
+        compress_settings={"memLevel": DEFLATE_MEM_LEVEL}
+    )]
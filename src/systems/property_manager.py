@@ -23,12 +23,36 @@ class PropertyManager:
         self._initialize_properties()
     
     def _initialize_properties(self) -> None:
-        """初始化房产数据"""
+        """初始化房产数据（全图扫描，用于从已有地图数据加载）"""
         self.properties.clear()
         for cell in self.game_map.cells:
             if cell.property:
                 self.properties[cell.property.position] = cell.property
     
+    def add_property(self, position: int, owner_id: Optional[int] = None, level: int = 0) -> Optional[Property]:
+        """
+        在指定位置新增房产，无需重新扫描整张地图
+        
+        Args:
+            position: 房产位置
+            owner_id: 所有者ID，None表示无主
+            level: 房产等级（0-4）
+            
+        Returns:
+            Optional[Property]: 新建的房产对象，位置无效时返回None
+        """
+        if not 0 <= position < self.game_map.width * self.game_map.height:
+            return None
+        cell = self.game_map.get_cell_at(self.game_map.rc_of(position))
+        if not cell:
+            return None
+        
+        property_obj = Property(position=position, owner_id=owner_id, level=level)
+        cell.cell_type = "empty"
+        cell.set_property(property_obj)
+        self.properties[position] = property_obj
+        return property_obj
+    
     def get_property_at_position(self, position: int) -> Optional[Property]:
         """
         获取指定位置的房产
@@ -52,8 +76,7 @@ class PropertyManager:
         Returns:
             Optional[Property]: 房产对象，如果不存在返回None
         """
-        position = x * self.game_map.width + y
-        return self.get_property_at_position(position)
+        return self.get_property_at_position(self.game_map.pos_of(x, y))
     
     def get_properties_by_owner(self, owner_id: int) -> List[Property]:
         """
@@ -13,8 +13,17 @@ class ShopSystem:
     def __init__(self):
         """初始化道具商店"""
         self.shop_items = {}  # 当前商店道具
+        self._version = 0  # 商店内容版本号，刷新或购买时递增
+        self._shop_items_cache = None
+        self._shop_items_cache_version = -1
+        self._affordable_cache = None  # 最近一次查询的可购买道具
+        self._affordable_cache_key = None  # (商店版本号, 金钱)
         self.refresh_shop()
     
+    def _bump_version(self):
+        """商店内容发生变化，使缓存失效"""
+        self._version += 1
+    
     def refresh_shop(self) -> Dict[str, any]:
         """
         刷新商店道具
@@ -38,6 +47,7 @@ class ShopSystem:
                 "description": item_info["description"],
                 "stock": 3  # 每个道具库存3个
             }
+        self._bump_version()
         
         return {
             "success": True,
@@ -49,10 +59,15 @@ class ShopSystem:
         """
         获取商店道具列表
         
+        商店内容未变化时复用同一份副本，调用方不应修改返回的字典
+        
         Returns:
             Dict: 商店道具信息
         """
-        return self.shop_items.copy()
+        if self._shop_items_cache_version != self._version:
+            self._shop_items_cache = self.shop_items.copy()
+            self._shop_items_cache_version = self._version
+        return self._shop_items_cache
     
     def buy_item(self, player: Player, item_name: str) -> Dict[str, any]:
         """
@@ -105,6 +120,7 @@ class ShopSystem:
         
         # 减少库存
         item_info["stock"] -= 1
+        self._bump_version()
         
         return {
             "success": True,
@@ -167,8 +183,11 @@ class ShopSystem:
         Returns:
             List[str]: 可购买道具列表
         """
-        affordable = []
-        for item_name in self.shop_items:
-            if self.can_afford_item(player, item_name):
-                affordable.append(item_name)
-        return affordable 
\ No newline at end of file
+        key = (self._version, player.money)
+        if self._affordable_cache_key != key:
+            self._affordable_cache = tuple(
+                item_name for item_name in self.shop_items
+                if self.can_afford_item(player, item_name)
+            )
+            self._affordable_cache_key = key
+        return list(self._affordable_cache) 
\ No newline at end of file
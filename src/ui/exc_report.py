@@ -0,0 +1,39 @@
+"""
+异常堆栈的限频打印
+游戏循环每帧都可能重复抛出同一异常，MainWindow与各修复脚本统一用这里的限频规则
+"""
+import time
+import traceback
+
+# 同一位置抛出的同类异常，两次报告的最小间隔（秒）
+REPORT_INTERVAL = 1.0
+
+# (异常类型, 抛出位置的代码对象) -> 上次报告的时间
+_last_report = {}
+
+def should_report(e):
+    """同一位置抛出的同类异常每 REPORT_INTERVAL 秒最多返回一次True"""
+    tb = e.__traceback__
+    if tb is not None:
+        while tb.tb_next is not None:
+            tb = tb.tb_next
+        key = (type(e), tb.tb_frame.f_code)
+    else:
+        key = (type(e), None)
+
+    now = time.monotonic()
+    if now - _last_report.get(key, 0.0) > REPORT_INTERVAL:
+        _last_report[key] = now
+        return True
+    return False
+
+def report_exception(e):
+    """按 should_report 限频打印异常堆栈，返回本次是否打印
+
+    之后清除__traceback__，不再保留堆栈帧引用的UI状态
+    """
+    printed = should_report(e)
+    if printed:
+        traceback.print_exception(type(e), e, e.__traceback__)
+    e.__traceback__ = None
+    return printed
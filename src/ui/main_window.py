@@ -4,6 +4,7 @@
 import pygame
 import sys
 import os
+import traceback
 from typing import List, Optional, Dict, Any, Tuple
 from src.models.map import Map
 from src.models.player import Player
@@ -28,6 +29,7 @@ from src.ui.save_load_window_pygame import SaveLoadWindow
 from src.ui.font_manager import font_manager, get_font, render_text
 from src.ui.animation_system import AnimationManager, PlayerMoveAnimation, DiceRollAnimation
 from src.ui.dice_renderer import DiceRenderer
+from src.ui.exc_report import report_exception
 
 
 class MainWindow:
@@ -87,6 +89,7 @@ class MainWindow:
         self.item_shop_window = None
         self.bank_window = None
         self.property_window = None
+        self._modal_windows = {}  # 已创建的模态窗口（商店/银行/房产），便于一次判断是否有窗口打开
         self.junction_window = None  # 岔路选择窗口
         self.save_load_window = None  # 存档管理窗口
         
@@ -1395,8 +1398,8 @@ class MainWindow:
             
         except Exception as e:
             print(f"❌ execute_settlement 异常: {e}")
-            import traceback
-            traceback.print_exc()
+            # 同一位置的同类异常每秒最多打印一次堆栈，避免每帧重复格式化
+            report_exception(e)
             
             # 发生错误时添加提示消息
             try:
@@ -1499,8 +1502,8 @@ class MainWindow:
                 if current_player:
                     print(f"🔧 当前玩家: {current_player.name}")
                     # 确保游戏继续运行 - 设置紧急恢复
-                    if not hasattr(self, 'emergency_recovery_timer'):
-                        self.emergency_recovery_timer = 3000  # 3秒后尝试恢复
+                    if not getattr(self, 'emergency_recovery_deadline', 0):
+                        self.emergency_recovery_deadline = pygame.time.get_ticks() + 3000  # 3秒后尝试恢复
                         print("🔧 设置紧急恢复定时器")
                         
             except Exception as e2:
@@ -1856,22 +1859,21 @@ class MainWindow:
                 self.map_view.update_camera()
             
             # 处理紧急恢复
-            if hasattr(self, 'emergency_recovery_timer') and self.emergency_recovery_timer > 0:
-                self.emergency_recovery_timer -= self.clock.get_time()
-                if self.emergency_recovery_timer <= 0:
-                    print("🔧 执行紧急恢复")
-                    delattr(self, 'emergency_recovery_timer')
-                    # 尝试重新开始准备阶段
-                    try:
-                        self.game_state.set_current_phase("preparation")
-                        self.start_preparation_phase()
-                        self.add_message("游戏已恢复正常", "success")
-                    except Exception as recovery_error:
-                        print(f"🔧 紧急恢复失败: {recovery_error}")
-                        # 最后手段：重置必要状态
-                        self.phase_auto_advance = False
-                        self.phase_timer = 0
-                        self.is_animating = False
+            deadline = getattr(self, 'emergency_recovery_deadline', 0)
+            if deadline and pygame.time.get_ticks() >= deadline:
+                print("🔧 执行紧急恢复")
+                self.emergency_recovery_deadline = 0
+                # 尝试重新开始准备阶段
+                try:
+                    self.game_state.set_current_phase("preparation")
+                    self.start_preparation_phase()
+                    self.add_message("游戏已恢复正常", "success")
+                except Exception as recovery_error:
+                    print(f"🔧 紧急恢复失败: {recovery_error}")
+                    # 最后手段：重置必要状态
+                    self.phase_auto_advance = False
+                    self.phase_timer = 0
+                    self.is_animating = False
             
             # 更新阶段计时器
             if self.phase_auto_advance and self.phase_timer > 0:
@@ -1891,8 +1893,8 @@ class MainWindow:
                     
         except Exception as e:
             print(f"🔧 update 异常: {e}")
-            import traceback
-            traceback.print_exc()
+            # 同一位置的同类异常每秒最多打印一次堆栈，避免每帧重复格式化
+            report_exception(e)
             # 不让异常传播，保持游戏运行
             try:
                 self.add_message("游戏更新时出现错误", "error")
@@ -2343,6 +2345,7 @@ class MainWindow:
                 on_close=self.close_dice_shop,
                 on_purchase=self.purchase_dice
             )
+            self._modal_windows["dice_shop"] = self.dice_shop_window
         
         # 显示窗口
         screen_width, screen_height = self.screen.get_size()
@@ -2430,6 +2433,7 @@ class MainWindow:
                 on_close=self.close_item_shop,
                 on_purchase=self.purchase_item
             )
+            self._modal_windows["item_shop"] = self.item_shop_window
         
         # 显示窗口
         screen_width, screen_height = self.screen.get_size()
@@ -2485,6 +2489,7 @@ class MainWindow:
                 on_deposit=self.bank_deposit,
                 on_withdraw=self.bank_withdraw
             )
+            self._modal_windows["bank"] = self.bank_window
         
         # 计算银行信息
         total_bank_assets = self.calculate_total_bank_assets()
@@ -2708,6 +2713,7 @@ class MainWindow:
                 on_build=self.build_property,
                 on_upgrade=self.upgrade_property
             )
+            self._modal_windows["property"] = self.property_window
         
         # 确定房产状态
         property_level = 0
@@ -219,6 +219,13 @@ class TestMap(unittest.TestCase):
         distance = self.map.calculate_distance((0, 0), (3, 4))
         self.assertEqual(distance, 7)  # 3 + 4 = 7
     
+    def test_position_conversion(self):
+        """测试位置编号与(行, 列)互相转换"""
+        self.assertEqual(self.map.pos_of(3, 4), 34)
+        self.assertEqual(self.map.rc_of(34), (3, 4))
+        for pos in (0, 9, 10, 99):
+            self.assertEqual(self.map.pos_of(*self.map.rc_of(pos)), pos)
+    
     def test_roadblock_operations(self):
         """测试路障操作"""
         # 测试放置路障
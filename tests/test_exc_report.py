@@ -0,0 +1,65 @@
+"""
+异常堆栈限频打印测试
+"""
+import unittest
+import sys
+import os
+from unittest import mock
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.ui import exc_report
+
+
+def _raise_value_error():
+    raise ValueError("测试异常")
+
+
+def _raise_other_value_error():
+    raise ValueError("另一处异常")
+
+
+def _catch(func):
+    try:
+        func()
+    except Exception as e:
+        return e
+
+
+class TestReportException(unittest.TestCase):
+    """同一位置的同类异常限频测试"""
+
+    def setUp(self):
+        exc_report._last_report.clear()
+        patcher = mock.patch.object(exc_report.traceback, "print_exception")
+        self.print_exception = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_same_site_throttled(self):
+        """同一位置的同类异常在间隔内只打印一次"""
+        self.assertTrue(exc_report.report_exception(_catch(_raise_value_error)))
+        self.assertFalse(exc_report.report_exception(_catch(_raise_value_error)))
+        self.assertEqual(self.print_exception.call_count, 1)
+
+    def test_different_sites_reported(self):
+        """不同位置抛出的异常分别打印"""
+        self.assertTrue(exc_report.report_exception(_catch(_raise_value_error)))
+        self.assertTrue(exc_report.report_exception(_catch(_raise_other_value_error)))
+
+    def test_reported_again_after_interval(self):
+        """超过间隔后再次打印"""
+        with mock.patch.object(exc_report.time, "monotonic", side_effect=[10.0, 10.5, 11.5]):
+            self.assertTrue(exc_report.should_report(_catch(_raise_value_error)))
+            self.assertFalse(exc_report.should_report(_catch(_raise_value_error)))
+            self.assertTrue(exc_report.should_report(_catch(_raise_value_error)))
+
+    def test_traceback_released(self):
+        """报告后清除异常的堆栈引用"""
+        e = _catch(_raise_value_error)
+        exc_report.report_exception(e)
+        self.assertIsNone(e.__traceback__)
+
+
+if __name__ == '__main__':
+    unittest.main()
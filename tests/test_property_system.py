@@ -173,6 +173,16 @@ class TestPropertyManager(unittest.TestCase):
         self.assertEqual(prop.level, 2)
         self.assertEqual(prop.owner_id, 1)
     
+    def test_add_property(self):
+        """测试增量添加房产"""
+        property_obj = self.property_manager.add_property(3 * 5 + 1, owner_id=2, level=1)
+        
+        self.assertIsNotNone(property_obj)
+        self.assertIs(self.property_manager.get_property_at_coordinates(3, 1), property_obj)
+        self.assertIs(self.game_map.get_cell_at((3, 1)).property, property_obj)
+        self.assertEqual(len(self.property_manager.get_properties_by_owner(2)), 1)
+        self.assertIsNone(self.property_manager.add_property(5 * 5 * 2))
+    
     def test_get_properties_by_owner(self):
         """测试获取指定玩家的房产"""
         player1_properties = self.property_manager.get_properties_by_owner(1)
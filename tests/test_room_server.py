@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+房间管理服务器单元测试
+在临时端口上运行 RoomServer，用真实的 websockets 客户端交互
+"""
+import sys
+import os
+PROJECT_ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.append(PROJECT_ROOT)
+sys.path.append(os.path.join(PROJECT_ROOT, 'server'))
+
+import asyncio
+import json
+import unittest
+from unittest import mock
+
+import websockets
+
+import room_server
+from src.network.wire import OUT_QUEUE_SIZE, RATE_LIMIT, MAX_MESSAGE_SIZE
+
+
+class RoomServerTestCase(unittest.IsolatedAsyncioTestCase):
+    """在临时端口上启动服务器的测试基类"""
+
+    binary = False
+
+    async def asyncSetUp(self):
+        self.server = room_server.RoomServer(self.binary)
+        sock = room_server.bind_available_port("localhost", 0)
+        self.uri = f"ws://localhost:{sock.getsockname()[1]}"
+        self.ws_server = await room_server.serve(self.server, sock)
+        self.connections = []
+
+    async def asyncTearDown(self):
+        for ws in self.connections:
+            await ws.close()
+        self.ws_server.close()
+        await self.ws_server.wait_closed()
+        for task in (self.server._clock_task, self.server._reaper_task):
+            if task is not None:
+                task.cancel()
+
+    async def connect(self):
+        """连接服务器并读取欢迎消息，返回 (连接, client_id)"""
+        ws = await websockets.connect(self.uri)
+        self.connections.append(ws)
+        welcome = await self.expect(ws, "success")
+        return ws, welcome["data"]["client_id"]
+
+    def decode(self, raw):
+        return json.loads(raw)
+
+    async def receive(self, ws, timeout=1.0):
+        """接收一帧，multi 帧展开为其中的消息列表"""
+        message = self.decode(await asyncio.wait_for(ws.recv(), timeout))
+        if message["message_type"] == "multi":
+            return message["data"]
+        return [message]
+
+    async def expect(self, ws, message_type, timeout=1.0):
+        """读取消息直到出现指定类型"""
+        while True:
+            for message in await self.receive(ws, timeout):
+                if message["message_type"] == message_type:
+                    return message
+
+    async def drain(self, ws, idle=0.3):
+        """读取所有消息，直到 idle 秒内没有新消息"""
+        messages = []
+        try:
+            while True:
+                messages.extend(await self.receive(ws, idle))
+        except asyncio.TimeoutError:
+            return messages
+
+    async def send(self, ws, message_type, data=None):
+        await ws.send(json.dumps({"message_type": message_type, "data": data or {}}))
+
+
+class TestRoomFlow(RoomServerTestCase):
+    """测试创建、加入房间与准备状态的广播"""
+
+    async def test_create_join_ready_broadcast(self):
+        """创建、加入、准备后房间内玩家都收到最新房间信息"""
+        host, _ = await self.connect()
+        await self.send(host, "create_room", {"room_name": "测试房间", "player_name": "甲"})
+        room = (await self.expect(host, "room_info"))["data"]["room"]
+        room_id = room["room_id"]
+        self.assertEqual(room["current_players"], 1)
+        self.assertTrue(room["players"][0]["is_host"])
+
+        guest, guest_id = await self.connect()
+        await self.send(guest, "room_list")
+        rooms = (await self.expect(guest, "room_list"))["data"]["rooms"]
+        self.assertEqual([r["room_id"] for r in rooms], [room_id])
+
+        await self.send(guest, "join_room", {"room_id": room_id, "player_name": "乙"})
+        for ws in (host, guest):
+            room = (await self.expect(ws, "room_info"))["data"]["room"]
+            self.assertEqual(room["current_players"], 2)
+
+        await self.send(guest, "player_ready", {"ready": True})
+        room = (await self.expect(host, "room_info"))["data"]["room"]
+        players = {p["client_id"]: p for p in room["players"]}
+        self.assertTrue(players[guest_id]["is_ready"])
+        self.assertFalse(players[guest_id]["is_host"])
+
+        # 房间变化后房间列表缓存失效
+        await self.send(guest, "room_list")
+        rooms = (await self.expect(guest, "room_list"))["data"]["rooms"]
+        self.assertEqual(rooms[0]["current_players"], 2)
+
+    async def test_empty_room_removed_from_list(self):
+        """最后一名玩家离开后房间从列表中删除"""
+        host, _ = await self.connect()
+        await self.send(host, "create_room", {"room_name": "临时房间", "player_name": "甲"})
+        await self.expect(host, "room_info")
+        await self.send(host, "leave_room")
+        await self.expect(host, "success")
+
+        await self.send(host, "room_list")
+        self.assertEqual((await self.expect(host, "room_list"))["data"]["rooms"], [])
+
+
+class TestSendQueue(RoomServerTestCase):
+    """测试发送队列：合并发送与慢客户端处理"""
+
+    async def test_backlog_coalesced_into_multi_frames(self):
+        """积压的消息合并为 multi 帧，按大小上限拆分且保持顺序"""
+        ws, client_id = await self.connect()
+        count = 50
+        padding = "x" * 3000
+        # 同步入队，写任务醒来时队列中已有全部积压
+        for i in range(count):
+            self.server._send_raw(client_id, self.server._text_frame("response", "message", f"{i:04d}{padding}"))
+
+        frames = []
+        messages = []
+        while len(messages) < count:
+            raw = await asyncio.wait_for(ws.recv(), 1.0)
+            frames.append(raw)
+            message = self.decode(raw)
+            messages.extend(message["data"] if message["message_type"] == "multi" else [message])
+
+        self.assertEqual([m["data"]["message"][:4] for m in messages], [f"{i:04d}" for i in range(count)])
+        self.assertGreater(len(frames), 1)
+        self.assertLess(len(frames), count)
+        # 每个 multi 帧最多超出上限一条消息
+        for raw in frames:
+            self.assertLess(len(raw), room_server.MULTI_FRAME_LIMIT + 2 * len(padding))
+
+    async def test_slow_client_closed_with_1008(self):
+        """关键消息放不进发送队列时以1008断开客户端"""
+        ws, client_id = await self.connect()
+        frame = self.server._text_frame("response", "message", "积压")
+        for _ in range(OUT_QUEUE_SIZE + 1):
+            self.server._send_raw(client_id, frame)
+
+        with self.assertRaises(websockets.ConnectionClosed) as cm:
+            while True:
+                await asyncio.wait_for(ws.recv(), 2.0)
+        self.assertEqual(cm.exception.rcvd.code, 1008)
+
+        await asyncio.sleep(0.1)
+        self.assertNotIn(client_id, self.server.clients)
+
+    async def test_droppable_frames_do_not_close(self):
+        """可丢弃的帧放不进队列时直接丢弃，连接保持"""
+        ws, client_id = await self.connect()
+        frame = self.server._text_frame("response", "message", "心跳")
+        for _ in range(OUT_QUEUE_SIZE + 10):
+            self.server._send_raw(client_id, frame, droppable=True)
+
+        self.assertEqual(len(await self.drain(ws)), OUT_QUEUE_SIZE)
+        await self.send(ws, "heartbeat")
+        await self.expect(ws, "heartbeat")
+
+
+class TestInboundLimits(RoomServerTestCase):
+    """测试入站消息的频率与大小限制"""
+
+    async def test_rate_limit_drops_excess(self):
+        """超出频率限制的消息被丢弃并回复错误"""
+        ws, _ = await self.connect()
+        extra = 10
+        for _ in range(RATE_LIMIT + extra):
+            await self.send(ws, "heartbeat")
+
+        messages = await self.drain(ws)
+        heartbeats = [m for m in messages if m["message_type"] == "heartbeat"]
+        errors = [m for m in messages if m["message_type"] == "error"]
+        self.assertEqual(len(heartbeats), RATE_LIMIT)
+        self.assertEqual(len(errors), extra)
+        self.assertEqual(errors[0]["data"]["error"], "消息过于频繁")
+
+    async def test_oversized_message_closed_with_1009(self):
+        """超过大小上限的消息导致连接以1009关闭"""
+        ws, _ = await self.connect()
+        await ws.send("x" * (MAX_MESSAGE_SIZE + 1))
+
+        with self.assertRaises(websockets.ConnectionClosed) as cm:
+            while True:
+                await asyncio.wait_for(ws.recv(), 2.0)
+        self.assertEqual(cm.exception.sent.code, 1009)
+
+    async def test_invalid_json_reports_error(self):
+        """无法解析的消息回复错误，连接保持"""
+        ws, _ = await self.connect()
+        await ws.send("{不是JSON")
+        self.assertEqual((await self.expect(ws, "error"))["data"]["error"], "无效的JSON格式")
+        await self.send(ws, "heartbeat")
+        await self.expect(ws, "heartbeat")
+
+
+@unittest.skipUnless(room_server.MSGPACK_AVAILABLE, "未安装msgpack")
+class TestMsgpackCodec(RoomServerTestCase):
+    """测试 --binary 模式下的 MessagePack 编码"""
+
+    binary = True
+
+    def decode(self, raw):
+        self.assertIsInstance(raw, bytes)
+        return room_server.msgpack.unpackb(raw, raw=False)
+
+    async def test_binary_frames(self):
+        """服务器发送 MessagePack 二进制帧，仍接受JSON文本帧"""
+        ws, client_id = await self.connect()
+        self.assertTrue(client_id.startswith("client_"))
+        await self.send(ws, "create_room", {"room_name": "二进制房间", "player_name": "甲"})
+        room = (await self.expect(ws, "room_info"))["data"]["room"]
+        self.assertEqual(room["name"], "二进制房间")
+
+        await self.send(ws, "heartbeat")
+        self.assertIn("timestamp", (await self.expect(ws, "heartbeat"))["data"])
+
+
+class TestGameRoomCache(unittest.TestCase):
+    """测试房间序列化缓存"""
+
+    def test_encoded_cache_invalidated_on_change(self):
+        """房间状态变化后序列化结果重新生成，并通知服务器"""
+        changes = []
+        room = room_server.GameRoom("r1", "房间", on_change=lambda: changes.append(1))
+        room.add_player("c1", "甲")
+        encoded = room.encoded()
+        self.assertIs(room.encoded(), encoded)
+
+        room.set_ready("c1", True)
+        self.assertIsNot(room.encoded(), encoded)
+        self.assertTrue(json.loads(room.encoded())["players"][0]["is_ready"])
+        self.assertEqual(len(changes), 2)
+
+    def test_host_transferred_on_leave(self):
+        """房主离开后由下一位玩家担任房主"""
+        room = room_server.GameRoom("r1", "房间")
+        room.add_player("c1", "甲")
+        room.add_player("c2", "乙")
+        room.remove_player("c1")
+        self.assertTrue(room.to_dict()["players"][0]["is_host"])
+
+
+class TestReaper(unittest.IsolatedAsyncioTestCase):
+    """测试清理已断开客户端的后台任务"""
+
+    async def test_reaper_removes_closed_clients(self):
+        """连接已关闭但未注销的客户端被清理，在线客户端保留"""
+        class FakeWebSocket:
+            close_code = None
+
+        server = room_server.RoomServer()
+        alive, closed = FakeWebSocket(), FakeWebSocket()
+        closed.close_code = 1006
+        writers = []
+        for client_id, ws in (("alive", alive), ("closed", closed)):
+            writer = asyncio.create_task(asyncio.sleep(10))
+            writers.append(writer)
+            server.clients[client_id] = room_server.ClientRec(client_id, ws, asyncio.Queue(), writer)
+
+        with mock.patch.object(room_server, "REAP_INTERVAL", 0.01):
+            reaper = asyncio.create_task(server._reap_closed_clients())
+            await asyncio.sleep(0.05)
+            reaper.cancel()
+
+        self.assertEqual(list(server.clients), ["alive"])
+        self.assertTrue(writers[1].cancelled())
+        writers[0].cancel()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+"""
+道具商店系统测试
+"""
+import unittest
+import sys
+import os
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.systems.shop_system import ShopSystem
+from src.models.player import Player
+
+
+class TestShopSystemCache(unittest.TestCase):
+    """商店缓存测试"""
+    
+    def setUp(self):
+        self.shop = ShopSystem()
+        self.player = Player(1, "测试玩家")
+        self.player.money = 100000
+    
+    def test_shop_items_reused_until_change(self):
+        """商店未变化时复用缓存"""
+        first = self.shop.get_shop_items()
+        self.assertIs(first, self.shop.get_shop_items())
+    
+    def test_buy_invalidates_cache(self):
+        """购买后库存更新"""
+        item_name = next(iter(self.shop.get_shop_items()))
+        result = self.shop.buy_item(self.player, item_name)
+        self.assertTrue(result["success"])
+        self.assertEqual(self.shop.get_shop_items()[item_name]["stock"], 2)
+    
+    def test_refresh_invalidates_cache(self):
+        """刷新后返回新的商店内容"""
+        before = self.shop.get_shop_items()
+        self.shop.refresh_shop()
+        after = self.shop.get_shop_items()
+        self.assertIsNot(before, after)
+        self.assertEqual(set(after), set(self.shop.shop_items))
+    
+    def test_affordable_items_follow_money_and_stock(self):
+        """可购买列表随金钱与库存变化"""
+        self.assertEqual(set(self.shop.get_affordable_items(self.player)),
+                         set(self.shop.shop_items))
+        self.player.money = 0
+        self.assertEqual(self.shop.get_affordable_items(self.player), [])
+        
+        self.player.money = 100000
+        item_name = next(iter(self.shop.shop_items))
+        for _ in range(3):
+            self.shop.buy_item(self.player, item_name)
+        self.player.money = 100000
+        self.assertNotIn(item_name, self.shop.get_affordable_items(self.player))
+
+
+if __name__ == '__main__':
+    unittest.main()